@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     name = 'api'
     verbose_name = 'API-сервис'
+
+    def ready(self):
+        from . import jobs  # noqa: F401
+        from .utils import register_pdf_fonts
+
+        register_pdf_fonts()
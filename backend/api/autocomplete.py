@@ -0,0 +1,74 @@
+import bisect
+import heapq
+import threading
+
+from recipes.catalog import get_catalog_version
+from recipes.models import Ingredient
+from .constants import PREFIX_UPPER_BOUND
+
+
+class IngredientPrefixIndex:
+    """
+    Отсортированный индекс названий ингредиентов в памяти процесса.
+    Строится при первом обращении и перестраивается, когда меняется
+    версия справочников.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._keys = None
+        self._items = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        items = sorted(
+            (
+                {'id': id, 'name': name, 'measurement_unit': unit}
+                for id, name, unit in Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
+                )
+            ),
+            key=lambda item: (item['name'].casefold(), item['id'])
+        )
+        return [item['name'].casefold() for item in items], items
+
+    def _get_index(self):
+        version = get_catalog_version()
+        with self._lock:
+            if self._version != version:
+                self._keys, self._items = self._build()
+                self._version = version
+            return self._keys, self._items
+
+    def search(self, query, limit):
+        """
+        Возвращает до limit ингредиентов: сначала совпадающие по началу
+        названия, затем содержащие запрос в середине названия.
+        """
+
+        query = query.strip().casefold()
+        if not query:
+            return []
+
+        keys, items = self._get_index()
+
+        start = bisect.bisect_left(keys, query)
+        end = bisect.bisect_left(keys, query + PREFIX_UPPER_BOUND, lo=start)
+        result = items[start:min(end, start + limit)]
+
+        if len(result) < limit:
+            substring_matches = heapq.nsmallest(
+                limit - len(result),
+                (
+                    (position, i) for position, i in (
+                        (key.find(query), i) for i, key in enumerate(keys)
+                    )
+                    if position > 0
+                )
+            )
+            result += [items[i] for _, i in substring_matches]
+
+        return result
+
+
+ingredient_index = IngredientPrefixIndex()
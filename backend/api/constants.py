@@ -9,3 +9,57 @@ TITLE_FONT_SIZE = 16
 FONT_SIZE = 12
 RECIPE_TITLE_LIMIT = 64
 PARAGRAPH_INDENTATION = 70
+PDF_FONT_NAME = 'DejaVu'
+PDF_FONT_FILE = 'docs/DejaVuSans.ttf'
+PDF_FALLBACK_FONT_NAME = 'Helvetica'
+PDF_CHUNK_SIZE = 64 * 1024
+
+# Ограничения выдачи автодополнения ингредиентов
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+# Символ, который больше любого символа в названии ингредиента
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
+# Выгрузка списка покупок в текстовых форматах: количество строк,
+# читаемых из курсора базы за раз, и размер отправляемой части ответа
+SHOPPING_LIST_FETCH_SIZE = 2000
+SHOPPING_LIST_STREAM_CHUNK_SIZE = 16 * 1024
+
+# Подбор рецептов по имеющимся ингредиентам: параметр запроса,
+# максимальное количество ингредиентов в запросе и порядок рецептов
+MATCH_INGREDIENTS_QUERY_PARAM = 'ingredients'
+MATCH_MAX_INGREDIENTS = 50
+MATCH_ORDERING = ('-coverage', 'missing', '-created', '-id')
+
+# Сортировки рецептов: параметр запроса и поля сортировки
+# для каждого значения параметра
+RECIPE_ORDERING_QUERY_PARAM = 'ordering'
+RECIPE_ORDERINGS = {
+    'trending': ('-trending_score', '-id'),
+    'popular': ('-popularity', '-id'),
+}
+
+# Полнотекстовый поиск рецептов: параметр запроса и порядок результатов
+# (по релевантности), если сортировка не задана параметром ordering
+SEARCH_QUERY_PARAM = 'search'
+SEARCH_ORDERING = ('-search_rank', '-created', '-id')
+
+# Префикс ключей кэша для списков покупок
+SHOPPING_LIST_CACHE_PREFIX = 'shopping_list_pdf'
+
+# Префикс ключей кэша справочников
+CATALOG_CACHE_PREFIX = 'catalog'
+
+# Параметры запроса для пагинации по курсору
+CURSOR_QUERY_PARAM = 'cursor'
+CURSOR_COUNT_QUERY_PARAM = 'count'
+
+# Профилирование: префикс ключей кэша и границы интервалов гистограммы
+# времени обработки запроса (в миллисекундах)
+PROFILING_CACHE_PREFIX = 'profiling'
+PROFILING_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Фоновое формирование PDF со списком покупок: вид задачи
+# и параметр запроса, включающий асинхронный режим
+SHOPPING_LIST_PDF_JOB = 'shopping_list_pdf'
+SHOPPING_LIST_ASYNC_QUERY_PARAM = 'async'
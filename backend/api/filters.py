@@ -1,33 +1,77 @@
-from django_filters import CharFilter, FilterSet, NumberFilter
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Exists, F, FloatField, OuterRef
+from django.db.models.functions import Cast
+from django_filters import CharFilter, ChoiceFilter, FilterSet, NumberFilter
 
-from recipes.models import Ingredient, Recipe
+from recipes.constants import SEARCH_CONFIG
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart
+from .constants import RECIPE_ORDERINGS, SEARCH_ORDERING
 
 
 class RecipeFilter(FilterSet):
     """
     Класс-фильтр для рецептов. Предоставляет фильтрацию по автору,
-    тегам, а также по нахождению рецептов в избранном и списке покупок.
+    тегам, а также по нахождению рецептов в избранном и списке покупок,
+    полнотекстовый поиск и сортировку по популярности.
     """
 
+    search = CharFilter(method='filter_search')
     tags = CharFilter(method='filter_tags')
     author = NumberFilter(field_name='author__id')
     is_favorited = NumberFilter(method='filter_is_favorited')
     is_in_shopping_cart = NumberFilter(method='filter_is_in_shopping_cart')
+    ordering = ChoiceFilter(
+        choices=[(value, value) for value in RECIPE_ORDERINGS],
+        method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author')
 
+    def filter_search(self, queryset, name, data):
+        """
+        Поиск по названию, ингредиентам и описанию рецепта с учетом
+        морфологии. Результаты упорядочены по релевантности.
+        Релевантность приводится к double precision: значение real
+        в курсоре после преобразования в текст не совпадает с исходным.
+        """
+
+        query = SearchQuery(
+            data, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(
+                SearchRank(F('search_vector'), query), FloatField()
+            )
+        ).order_by(*SEARCH_ORDERING)
+
+    def filter_ordering(self, queryset, name, data):
+        """
+        Сортировка trending — по популярности за последнее время,
+        popular — по общему количеству добавлений в избранное
+        и список покупок. Обе сортировки выполняются по индексу.
+        """
+
+        return queryset.annotate(
+            popularity=F('favorites_count') + F('shopping_carts_count')
+        ).order_by(*RECIPE_ORDERINGS[data])
+
     def filter_tags(self, queryset, name, data):
         tags = self.request.query_params.getlist('tags')
 
         if not tags:
             return queryset
 
-        queryset = queryset.filter(tags__slug__in=tags).distinct()
-        return queryset
+        # Полусоединение вместо JOIN с DISTINCT: каждый рецепт попадает
+        # в выборку один раз, сколько бы тегов ни совпало.
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe=OuterRef('pk'), tag__slug__in=tags
+            )
+        ))
 
-    def _filter_by_user_relation(self, queryset, data, related_field):
+    def _filter_by_user_relation(self, queryset, data, model):
         """
         Фильтр для проверки наличия/отсутствия связи
         между рецептом и пользователем.
@@ -37,19 +81,18 @@ class RecipeFilter(FilterSet):
         if not user.is_authenticated:
             return queryset
 
+        relation = Exists(
+            model.objects.filter(user=user, recipe=OuterRef('pk'))
+        )
         if data:
-            return queryset.filter(**{related_field: user})
-        return queryset.exclude(**{related_field: user})
+            return queryset.filter(relation)
+        return queryset.filter(~relation)
 
     def filter_is_favorited(self, queryset, name, data):
-        return self._filter_by_user_relation(
-            queryset, data, 'favorite_set__user'
-        )
+        return self._filter_by_user_relation(queryset, data, Favorite)
 
     def filter_is_in_shopping_cart(self, queryset, name, data):
-        return self._filter_by_user_relation(
-            queryset, data, 'shoppingcart_set__user'
-        )
+        return self._filter_by_user_relation(queryset, data, ShoppingCart)
 
 
 class IngredientFilter(FilterSet):
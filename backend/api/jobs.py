@@ -0,0 +1,23 @@
+from django.core.files.base import ContentFile
+
+from recipes.jobs import job_handler
+from recipes.models import Recipe
+from .constants import SHOPPING_LIST_PDF_JOB
+from .utils import generate_shopping_list_pdf
+
+
+@job_handler(SHOPPING_LIST_PDF_JOB)
+def render_shopping_list_pdf(job):
+    """
+    Формирует PDF со списком покупок из параметров задачи и сохраняет
+    его в хранилище медиафайлов, откуда файл отдает nginx.
+    """
+
+    recipes = [
+        Recipe(id=recipe_id, name=name)
+        for recipe_id, name in job.payload['recipes']
+    ]
+    pdf = generate_shopping_list_pdf(recipes, job.payload['ingredients'])
+    job.result.save(
+        f'shopping_list_{job.id}.pdf', ContentFile(pdf), save=False
+    )
@@ -0,0 +1,553 @@
+import base64
+import io
+import json
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment,
+    teardown_test_environment
+)
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.feed import create_feed_items, get_followers, get_latest_recipes
+from recipes.images import executor as image_executor
+from recipes.models import (
+    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag
+)
+from recipes.search import update_recipe_indexes
+from users.models import Subscription
+
+User = get_user_model()
+
+BENCHMARK_PASSWORD = 'bench-Pa55word'
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = round((len(values) - 1) * percent / 100)
+    return values[index]
+
+
+def make_image_file():
+    """Возвращает небольшое PNG-изображение для загрузки файлом."""
+
+    with io.BytesIO() as buffer:
+        Image.new('RGB', (64, 64), (200, 120, 40)).save(buffer, 'PNG')
+        return SimpleUploadedFile(
+            'benchmark.png', buffer.getvalue(), content_type='image/png'
+        )
+
+
+def make_image():
+    """Возвращает небольшое PNG-изображение в формате data URI."""
+
+    encoded = base64.b64encode(make_image_file().read()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест API: заполняет тестовую базу синтетическими '
+        'данными и измеряет количество запросов к БД, задержку и '
+        'потребление памяти для каждого эндпоинта'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--recipes', type=int, default=20000)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--carts-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Количество замеров каждого эндпоинта'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', type=str, default='benchmark_report.json',
+            help='Файл для сохранения отчета'
+        )
+        parser.add_argument(
+            '--baseline', type=str,
+            help='Отчет, с которым сравниваются результаты'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый относительный рост p95 задержки и пиковой памяти'
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять тестовую базу данных после замеров'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.random = random.Random(options['seed'])
+
+        # Миграции используют возможности PostgreSQL (классы операторов
+        # индексов, массивы, полнотекстовый поиск).
+        if connection.vendor != 'postgresql':
+            raise CommandError('Нагрузочный тест требует PostgreSQL')
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, keepdb=options['keepdb'], serialize=False
+        )
+        # Изображения, копии, аватары и PDF не попадают в MEDIA_ROOT.
+        media_root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                try:
+                    if not Recipe.objects.exists():
+                        self.seed()
+                    results = self.run_benchmarks()
+                finally:
+                    # Потоки создания копий изображений не должны
+                    # обращаться к тестовой базе после ее удаления.
+                    image_executor.shutdown(wait=True)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        report = {
+            'database': connection.vendor,
+            'dataset': {
+                key: options[key] for key in (
+                    'users', 'recipes', 'favorites_per_user',
+                    'carts_per_user', 'subscriptions_per_user', 'seed'
+                )
+            },
+            'repeat': options['repeat'],
+            'endpoints': results,
+        }
+        Path(options['output']).write_text(
+            json.dumps(report, indent=2, ensure_ascii=False),
+            encoding='utf-8'
+        )
+        self.print_results(results)
+        self.stdout.write(f'Отчет сохранен в {options["output"]}')
+
+        if options['baseline']:
+            self.compare(results, options['baseline'])
+
+    def seed(self):
+        options = self.options
+        self.stdout.write('Заполнение тестовой базы данных...')
+        started = time.monotonic()
+
+        call_command(
+            'load_data', path=str(settings.BASE_DIR / 'data'),
+            stdout=io.StringIO()
+        )
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+
+        password = make_password(BENCHMARK_PASSWORD)
+        User.objects.bulk_create(
+            User(
+                username=f'user{i}', email=f'user{i}@example.com',
+                first_name=f'Имя{i}', last_name=f'Фамилия{i}',
+                password=password
+            )
+            for i in range(options['users'])
+        )
+        user_ids = list(User.objects.values_list('id', flat=True))
+
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=self.random.choice(user_ids),
+                    name=f'Рецепт {i}',
+                    text='Описание рецепта. ' * self.random.randint(5, 50),
+                    cooking_time=self.random.randint(5, 180),
+                    image='recipes/images/benchmark.png',
+                    short_link_token=f'b{i}',
+                )
+                for i in range(options['recipes'])
+            ),
+            batch_size=1000
+        )
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(
+                    recipe_id=recipe_id, ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500)
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in self.random.sample(
+                    ingredient_ids, self.random.randint(3, 12)
+                )
+            ),
+            batch_size=5000
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in self.random.sample(
+                    tag_ids, self.random.randint(1, len(tag_ids))
+                )
+            ),
+            batch_size=5000
+        )
+        # Рецепты созданы bulk_create, сигналы не вызывались.
+        update_recipe_indexes(recipe_ids)
+
+        for model, per_user in (
+            (Favorite, options['favorites_per_user']),
+            (ShoppingCart, options['carts_per_user']),
+        ):
+            model.objects.bulk_create(
+                (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id in user_ids
+                    for recipe_id in self.random.sample(
+                        recipe_ids, min(per_user, len(recipe_ids))
+                    )
+                ),
+                batch_size=5000
+            )
+
+        Subscription.objects.bulk_create(
+            (
+                Subscription(user_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in self.random.sample(
+                    user_ids, min(
+                        options['subscriptions_per_user'] + 1, len(user_ids)
+                    )
+                )
+                if author_id != user_id
+            ),
+            batch_size=5000
+        )
+
+        # Пересчитываются и суммарные ингредиенты списков покупок.
+        call_command('rebuild_counters', stdout=io.StringIO())
+        call_command('rebuild_trending_scores', stdout=io.StringIO())
+        call_command('rebuild_similar_recipes', stdout=io.StringIO())
+
+        # Ленты заполняются так же, как при подписке: рецепты авторов
+        # с большим числом подписчиков добавляются в ленту при чтении.
+        for author_id in User.objects.filter(
+            followers_count__gt=0,
+            followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS
+        ).values_list('pk', flat=True).iterator():
+            recipes = get_latest_recipes(author_id)
+            for user_ids in get_followers(author_id):
+                create_feed_items(user_ids, recipes)
+        self.stdout.write(
+            f'Данные созданы за {time.monotonic() - started:.1f} с'
+        )
+
+    def get_scenarios(self):
+        """
+        Сценарии замеров. Каждый сценарий — последовательность шагов,
+        которые выполняются вместе, чтобы изменяющие запросы не накапливали
+        состояние: например, добавление в избранное и удаление из него.
+        Путь шага может ссылаться на значения, сохраненные предыдущими
+        шагами сценария.
+        """
+
+        user = User.objects.order_by('-followers_count').first()
+        author = User.objects.exclude(
+            followers__user=user
+        ).exclude(pk=user.pk).first()
+        recipe = Recipe.objects.exclude(favorite_set__user=user).exclude(
+            shoppingcart_set__user=user
+        ).first()
+        tag = Tag.objects.first()
+        ingredient = Ingredient.objects.first()
+        search_term = Ingredient.objects.filter(
+            ingredient_recipes__recipe=recipe
+        ).values_list('name', flat=True).first().split()[0]
+        ingredient_ids = list(
+            Ingredient.objects.values_list('id', flat=True)[:10]
+        )
+        match_ingredients = ','.join(map(str, sorted({
+            *recipe.ingredient_ids, *ingredient_ids[:5]
+        })))
+        image = make_image()
+        recipe_data = {
+            'name': 'Рецепт для замера',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': image,
+            'tags': [tag.id],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 10}
+                for ingredient_id in ingredient_ids
+            ],
+        }
+        last_page = -(-Recipe.objects.count() // settings.PAGE_SIZE)
+        counter = iter(range(10 ** 9))
+        self.user = user
+
+        def new_user_data():
+            number = next(counter)
+            return {
+                'email': f'new{number}@example.com',
+                'username': f'new{number}',
+                'first_name': 'Имя',
+                'last_name': 'Фамилия',
+                'password': BENCHMARK_PASSWORD,
+            }
+
+        return [
+            [('users_list', 'get', '/api/users/', None)],
+            [('users_detail', 'get', f'/api/users/{author.id}/', None)],
+            [('users_me', 'get', '/api/users/me/', None)],
+            [('users_create', 'post', '/api/users/', new_user_data)],
+            [(
+                'users_set_password', 'post', '/api/users/set_password/',
+                {
+                    'current_password': BENCHMARK_PASSWORD,
+                    'new_password': BENCHMARK_PASSWORD,
+                }
+            )],
+            [
+                ('avatar_put', 'put', '/api/users/me/avatar/',
+                 {'avatar': image}),
+                ('avatar_delete', 'delete', '/api/users/me/avatar/', None),
+            ],
+            [
+                ('auth_token_login', 'post', '/api/auth/token/login/',
+                 {'email': user.email, 'password': BENCHMARK_PASSWORD}),
+                ('auth_token_logout', 'post', '/api/auth/token/logout/',
+                 None),
+            ],
+            [('subscriptions_list', 'get', '/api/users/subscriptions/',
+              None)],
+            [(
+                'subscriptions_list_limited', 'get',
+                '/api/users/subscriptions/?recipes_limit=3', None
+            )],
+            [
+                ('subscribe', 'post', f'/api/users/{author.id}/subscribe/',
+                 None),
+                ('unsubscribe', 'delete',
+                 f'/api/users/{author.id}/subscribe/', None),
+            ],
+            [('tags_list', 'get', '/api/tags/', None)],
+            [('tags_detail', 'get', f'/api/tags/{tag.id}/', None)],
+            [('ingredients_list', 'get', '/api/ingredients/', None)],
+            [(
+                'ingredients_search', 'get',
+                f'/api/ingredients/?name={ingredient.name[:2]}', None
+            )],
+            [(
+                'ingredients_detail', 'get',
+                f'/api/ingredients/{ingredient.id}/', None
+            )],
+            [(
+                'ingredients_autocomplete', 'get',
+                f'/api/ingredients/autocomplete/?name={ingredient.name[:2]}',
+                None
+            )],
+            [('recipes_list', 'get', '/api/recipes/', None)],
+            [('recipes_list_max_page', 'get',
+              f'/api/recipes/?limit={settings.MAX_PAGE_SIZE}', None)],
+            [('recipes_list_deep_page', 'get',
+              f'/api/recipes/?page={last_page}', None)],
+            [('recipes_list_cursor', 'get', '/api/recipes/?cursor=', None)],
+            [('recipes_list_trending', 'get',
+              '/api/recipes/?ordering=trending', None)],
+            [('recipes_list_trending_cursor', 'get',
+              '/api/recipes/?ordering=trending&cursor=', None)],
+            [('recipes_list_popular', 'get',
+              '/api/recipes/?ordering=popular', None)],
+            [('recipes_search', 'get',
+              f'/api/recipes/?search={search_term}', None)],
+            [('recipes_match', 'get',
+              f'/api/recipes/match/?ingredients={match_ingredients}', None)],
+            [('recipes_match_cursor', 'get',
+              f'/api/recipes/match/?ingredients={match_ingredients}'
+              '&cursor=', None)],
+            [('recipes_filter_tags', 'get',
+              f'/api/recipes/?tags={tag.slug}', None)],
+            [('recipes_filter_author', 'get',
+              f'/api/recipes/?author={author.id}', None)],
+            [('recipes_filter_favorited', 'get',
+              '/api/recipes/?is_favorited=1', None)],
+            [('recipes_filter_not_in_cart', 'get',
+              '/api/recipes/?is_in_shopping_cart=0', None)],
+            [('recipes_feed', 'get', '/api/recipes/feed/', None)],
+            [('recipes_detail', 'get', f'/api/recipes/{recipe.id}/', None)],
+            [('recipes_similar', 'get',
+              f'/api/recipes/{recipe.id}/similar/', None)],
+            [('recipes_get_link', 'get',
+              f'/api/recipes/{recipe.id}/get-link/', None)],
+            [('short_link_redirect', 'get',
+              f'/s/{recipe.short_link_token}/', None)],
+            [(
+                'recipes_upload_image', 'post', '/api/recipes/upload-image/',
+                lambda: {'image': make_image_file()}
+            )],
+            [
+                ('recipes_create', 'post', '/api/recipes/', recipe_data),
+                ('recipes_update', 'patch', '/api/recipes/{id}/',
+                 {**recipe_data, 'name': 'Новое название'}),
+                ('recipes_delete', 'delete', '/api/recipes/{id}/', None),
+            ],
+            [
+                ('favorite_add', 'post',
+                 f'/api/recipes/{recipe.id}/favorite/', None),
+                ('favorite_remove', 'delete',
+                 f'/api/recipes/{recipe.id}/favorite/', None),
+            ],
+            [
+                ('shopping_cart_add', 'post',
+                 f'/api/recipes/{recipe.id}/shopping_cart/', None),
+                ('shopping_cart_remove', 'delete',
+                 f'/api/recipes/{recipe.id}/shopping_cart/', None),
+            ],
+            [('download_shopping_cart', 'get',
+              '/api/recipes/download_shopping_cart/', None)],
+            [('shopping_cart_ingredients', 'get',
+              '/api/recipes/shopping_cart_ingredients/', None)],
+            [
+                ('download_shopping_cart_async', 'get',
+                 '/api/recipes/download_shopping_cart/?async=1', None),
+                ('jobs_detail', 'get', '/api/jobs/{id}/', None),
+            ],
+        ]
+
+    def request(self, client, method, path, data, context):
+        if callable(data):
+            data = data()
+        # Данные с файлами отправляются формой multipart/form-data.
+        data_format = 'json'
+        if isinstance(data, dict) and any(
+            isinstance(value, File) for value in data.values()
+        ):
+            data_format = 'multipart'
+        response = getattr(client, method)(
+            path.format(**context), data, format=data_format
+        )
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{method.upper()} {path} вернул {response.status_code}: '
+                f'{response.content[:200]}'
+            )
+        if response.get('Content-Type') == 'application/json':
+            content = response.json()
+            if isinstance(content, dict) and 'id' in content:
+                context['id'] = content['id']
+        if hasattr(response, 'streaming_content'):
+            b''.join(response.streaming_content)
+        return response
+
+    def run_benchmarks(self):
+        self.stdout.write('Замеры...')
+        scenarios = self.get_scenarios()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        results = {}
+
+        for scenario in scenarios:
+            timings = {name: [] for name, *_ in scenario}
+
+            # Первый проход: количество запросов и пиковая память.
+            context = {}
+            for name, method, path, data in scenario:
+                tracemalloc.start()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.request(
+                        client, method, path, data, context
+                    )
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results[name] = {
+                    'method': method.upper(),
+                    'path': path,
+                    'status': response.status_code,
+                    'queries': len(queries),
+                    'peak_memory_kb': round(peak / 1024, 1),
+                }
+
+            for _ in range(self.options['repeat']):
+                context = {}
+                for name, method, path, data in scenario:
+                    started = time.perf_counter()
+                    self.request(client, method, path, data, context)
+                    timings[name].append(
+                        (time.perf_counter() - started) * 1000
+                    )
+
+            for name, values in timings.items():
+                results[name]['p50_ms'] = round(percentile(values, 50), 2)
+                results[name]['p95_ms'] = round(percentile(values, 95), 2)
+
+        return results
+
+    def print_results(self, results):
+        self.stdout.write(
+            f'{"эндпоинт":<32}{"запросы":>9}{"p50, мс":>10}'
+            f'{"p95, мс":>10}{"память, КБ":>12}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<32}{result["queries"]:>9}{result["p50_ms"]:>10}'
+                f'{result["p95_ms"]:>10}{result["peak_memory_kb"]:>12}'
+            )
+
+    def compare(self, results, baseline_path):
+        """
+        Сравнивает результаты с базовым отчетом. Регрессией считается
+        рост количества запросов или рост p95 задержки или пиковой памяти
+        больше допустимого.
+        """
+
+        baseline = json.loads(
+            Path(baseline_path).read_text(encoding='utf-8')
+        )['endpoints']
+        tolerance = self.options['tolerance']
+        regressions = []
+
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            expected = baseline[name]
+            if result['queries'] > expected['queries']:
+                regressions.append(
+                    f'{name}: запросов {expected["queries"]} -> '
+                    f'{result["queries"]}'
+                )
+            if result['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: p95 {expected["p95_ms"]} -> '
+                    f'{result["p95_ms"]} мс'
+                )
+            if result['peak_memory_kb'] > (
+                expected['peak_memory_kb'] * (1 + tolerance)
+            ):
+                regressions.append(
+                    f'{name}: память {expected["peak_memory_kb"]} -> '
+                    f'{result["peak_memory_kb"]} КБ'
+                )
+
+        if regressions:
+            raise CommandError(
+                'Обнаружены регрессии:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий не обнаружено'))
@@ -0,0 +1,54 @@
+import json
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import get_aggregates, reset_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Вывод агрегированных результатов профилирования запросов по view'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести результаты в формате JSON'
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Очистить результаты после вывода'
+        )
+
+    def handle(self, *args, **options):
+        # Результаты записывает веб-сервер, поэтому в кэше процесса
+        # команды их нет.
+        if isinstance(caches['default'], (DummyCache, LocMemCache)):
+            raise CommandError(
+                'Результаты профилирования хранятся в кэше процесса '
+                'веб-сервера. Укажите общий кэш в CACHE_BACKEND.'
+            )
+
+        aggregates = get_aggregates()
+
+        if options['json']:
+            self.stdout.write(
+                json.dumps(aggregates, indent=2, ensure_ascii=False)
+            )
+        else:
+            for view_name, data in aggregates.items():
+                requests = data['requests'] or 1
+                self.stdout.write(
+                    f'{view_name}: {data["requests"]} обращений, '
+                    f'в среднем {data["queries"] / requests:.1f} SQL '
+                    f'({data["duplicates"] / requests:.1f} повторов), '
+                    f'БД {data["db_us"] / requests / 1000:.1f} мс, '
+                    f'всего {data["total_us"] / requests / 1000:.1f} мс'
+                )
+                for bucket, count in data['histogram_ms'].items():
+                    if count:
+                        self.stdout.write(f'  <= {bucket} мс: {count}')
+
+        if options['reset']:
+            reset_aggregates()
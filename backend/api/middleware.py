@@ -0,0 +1,66 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .profiling import QueryProfile, record_profile
+
+logger = logging.getLogger('api.profiling')
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование запросов: количество и время SQL-запросов, повторы
+    запросов и время работы Python-кода (view, сериализаторы, рендеринг).
+    Профилируется доля запросов PROFILING_SAMPLE_RATE; при нулевом
+    значении middleware отключается. Результаты пишутся в лог
+    api.profiling, суммируются по view в кэше и, если включен
+    PROFILING_SERVER_TIMING, возвращаются в заголовке Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        if settings.PROFILING_SAMPLE_RATE <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        started = time.perf_counter()
+        with connection.execute_wrapper(profile):
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        db_ms = profile.duration * 1000
+        total_ms = total * 1000
+
+        record_profile(view_name, profile, total)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': profile.count,
+            'duplicate_queries': profile.duplicates,
+            'similar_queries': profile.similar,
+            'db_ms': round(db_ms, 2),
+            'app_ms': round(total_ms - db_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }, ensure_ascii=False))
+
+        if settings.PROFILING_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={db_ms:.2f};desc="{profile.count} queries, '
+                f'{profile.duplicates} duplicates", '
+                f'app;dur={total_ms - db_ms:.2f}, '
+                f'total;dur={total_ms:.2f}'
+            )
+        return response
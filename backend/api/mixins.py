@@ -0,0 +1,69 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipes.catalog import get_catalog_version
+from .constants import CATALOG_CACHE_PREFIX
+
+
+class CatalogCacheMixin:
+    """
+    Миксин кэширует ответы справочников на CATALOG_CACHE_TIMEOUT
+    с учетом параметров фильтров. Ключ кэша и ETag содержат версию
+    справочников, поэтому при ее изменении старые ответы перестают
+    использоваться.
+    Повторный запрос с совпадающим If-None-Match получает ответ 304
+    без обращения к базе данных.
+    """
+
+    # Справочники общедоступны, аутентификация только добавила бы
+    # запрос к базе данных для поиска токена.
+    authentication_classes = ()
+
+    def _get_cache_key(self, request):
+        # Остальные параметры не влияют на ответ и не должны порождать
+        # новые ключи кэша.
+        filterset_class = getattr(self, 'filterset_class', None)
+        names = sorted(filterset_class.base_filters) if filterset_class else ()
+        query = urlencode(
+            [
+                (name, request.query_params.getlist(name))
+                for name in names if name in request.query_params
+            ],
+            doseq=True
+        )
+        return (
+            f'{CATALOG_CACHE_PREFIX}:{get_catalog_version()}:'
+            f'{request.path}?{query}'
+        )
+
+    def _cached_response(self, request, handler, *args, **kwargs):
+        cache_key = self._get_cache_key(request)
+        etag = f'"{hashlib.sha256(cache_key.encode()).hexdigest()}"'
+
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = cache.get(cache_key)
+            if data is None:
+                data = handler(request, *args, **kwargs).data
+                cache.set(cache_key, data, settings.CATALOG_CACHE_TIMEOUT)
+            response = Response(data)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = (
+            f'public, max-age={settings.CATALOG_CACHE_MAX_AGE}'
+        )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            request, super().retrieve, *args, **kwargs
+        )
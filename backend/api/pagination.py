@@ -1,8 +1,216 @@
+import base64
+import binascii
+import json
+
 from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from recipes.feed import get_feed_entries
+from .constants import (
+    CURSOR_COUNT_QUERY_PARAM, CURSOR_QUERY_PARAM, MATCH_ORDERING,
+    RECIPE_ORDERING_QUERY_PARAM, RECIPE_ORDERINGS, SEARCH_ORDERING,
+    SEARCH_QUERY_PARAM
+)
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size = settings.PAGE_SIZE
     page_size_query_param = 'limit'
     max_page_size = settings.MAX_PAGE_SIZE
+
+
+class OptionalKeysetPagination(LimitPageNumberPagination):
+    """
+    Пагинация с опциональным режимом курсора.
+    Без параметра cursor работает как постраничная пагинация.
+    С параметром cursor (пустым для первой страницы) следующая страница
+    выбирается условием по полям ordering, без OFFSET. Общее количество
+    объектов считается только при переданном параметре count.
+    """
+
+    ordering = ('-created', '-id')
+    cursor_query_param = CURSOR_QUERY_PARAM
+    count_query_param = CURSOR_COUNT_QUERY_PARAM
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def is_cursor_mode(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def get_ordering(self, request):
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.is_cursor_mode(request)
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param):
+            self.count = queryset.count()
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(
+                self.get_seek_filter(self.decode_cursor(cursor, queryset))
+            )
+
+        page = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self.encode_cursor(page[-1])
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+
+        content = {'next': self.get_next_cursor_link(), 'results': data}
+        if self.count is not None:
+            content = {'count': self.count, **content}
+        return Response(content)
+
+    def get_next_cursor_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param, self.next_cursor
+        )
+
+    def _get_fields(self):
+        return [
+            (field.lstrip('-'), field.startswith('-'))
+            for field in self.ordering
+        ]
+
+    def get_seek_filter(self, values):
+        """
+        Условие выбора объектов после курсора. Первое поле дополнительно
+        ограничено нестрогим неравенством, чтобы индекс по полям сортировки
+        использовался как условие поиска, а не только для порядка.
+        """
+
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self._get_fields(), values):
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+
+        name, descending = self._get_fields()[0]
+        lookup = 'lte' if descending else 'gte'
+        return Q(**{f'{name}__{lookup}': values[0]}) & condition
+
+    def encode_cursor(self, obj):
+        return self.encode_values(
+            getattr(obj, name) for name, _ in self._get_fields()
+        )
+
+    def encode_values(self, values):
+        """Курсор из значений полей ordering."""
+
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in values
+        ]
+        return base64.urlsafe_b64encode(
+            json.dumps(values).encode()
+        ).decode()
+
+    def decode_cursor(self, cursor, queryset):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                self.get_output_field(queryset, name).to_python(value)
+                for (name, _), value in zip(self._get_fields(), values)
+            ]
+        except (
+            binascii.Error, DjangoValidationError, TypeError, ValueError
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_output_field(self, queryset, name):
+        """Поле модели или аннотация queryset с именем name."""
+
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+
+class RecipePagination(OptionalKeysetPagination):
+    """
+    В режиме курсора порядок рецептов задается параметром ordering,
+    а при поиске без него — релевантностью, как и в постраничном режиме.
+    Курсор результатов поиска содержит значение релевантности.
+    """
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(RECIPE_ORDERING_QUERY_PARAM)
+        if ordering in RECIPE_ORDERINGS:
+            return RECIPE_ORDERINGS[ordering]
+        if request.query_params.get(SEARCH_QUERY_PARAM):
+            return SEARCH_ORDERING
+        return self.ordering
+
+
+class MatchPagination(OptionalKeysetPagination):
+    """
+    Подобранные по ингредиентам рецепты и в режиме курсора упорядочены
+    по доле имеющихся ингредиентов, курсор содержит значения аннотаций.
+    """
+
+    ordering = MATCH_ORDERING
+
+
+class SubscriptionPagination(OptionalKeysetPagination):
+    ordering = ('username', 'id')
+
+
+class FeedPagination(OptionalKeysetPagination):
+    """
+    Лента подписок всегда выдается по курсору. Страница выбирается
+    из записей ленты пользователя, а не из всех рецептов: переданный
+    queryset используется только для загрузки рецептов страницы.
+    Общее количество рецептов в ленте не считается. Курсор строится
+    по последней записи ленты на странице, даже если ее рецепт удален.
+    """
+
+    def is_cursor_mode(self, request):
+        return True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = True
+        self.count = None
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        entries = get_feed_entries(
+            request.user, page_size + 1,
+            self.decode_cursor(cursor, queryset) if cursor else None
+        )
+        has_next = len(entries) > page_size
+        ids = [recipe_id for _, recipe_id in entries[:page_size]]
+        recipes = queryset.in_bulk(ids)
+        # Рецепт мог быть удален после выборки ленты.
+        page = [
+            recipes[recipe_id] for recipe_id in ids if recipe_id in recipes
+        ]
+
+        self.next_cursor = None
+        if has_next:
+            self.next_cursor = self.encode_values(entries[page_size - 1])
+        return page
@@ -0,0 +1,136 @@
+import time
+from collections import Counter
+
+from django.core.cache import cache
+
+from .constants import PROFILING_BUCKETS_MS, PROFILING_CACHE_PREFIX
+
+# Количество view с результатами профилирования. Имя каждого view
+# хранится в отдельном ключе с номером, поэтому одновременные запросы
+# не перезаписывают список view друг друга.
+VIEWS_COUNT_KEY = f'{PROFILING_CACHE_PREFIX}:views_count'
+SUM_FIELDS = ('requests', 'queries', 'duplicates', 'db_us', 'total_us')
+
+
+class QueryProfile:
+    """
+    Обертка выполнения SQL-запросов (connection.execute_wrapper).
+    Считает запросы, их суммарное время и повторы одного и того же
+    запроса с одинаковыми параметрами.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values())
+
+    @property
+    def similar(self):
+        """Количество повторов запросов, отличающихся только параметрами."""
+
+        queries = Counter()
+        for (sql, _), count in self.statements.items():
+            queries[sql] += count
+        return sum(count - 1 for count in queries.values())
+
+
+def get_bucket(duration_ms):
+    for bound in PROFILING_BUCKETS_MS:
+        if duration_ms <= bound:
+            return str(bound)
+    return 'inf'
+
+
+def get_buckets():
+    return [str(bound) for bound in PROFILING_BUCKETS_MS] + ['inf']
+
+
+def _key(view_name, field):
+    return f'{PROFILING_CACHE_PREFIX}:{view_name}:{field}'
+
+
+def _view_key(index):
+    return f'{PROFILING_CACHE_PREFIX}:view:{index}'
+
+
+def _incr(key, delta):
+    if not cache.add(key, delta, None):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, None)
+
+
+def record_profile(view_name, profile, total):
+    """Добавляет результаты профилирования запроса в агрегаты по view."""
+
+    # Ключ добавляется атомарно, поэтому view регистрируется один раз.
+    if cache.add(_key(view_name, 'registered'), True, None):
+        cache.add(VIEWS_COUNT_KEY, 0, None)
+        cache.set(_view_key(cache.incr(VIEWS_COUNT_KEY)), view_name, None)
+
+    values = {
+        'requests': 1,
+        'queries': profile.count,
+        'duplicates': profile.duplicates,
+        'db_us': int(profile.duration * 1_000_000),
+        'total_us': int(total * 1_000_000),
+    }
+    for field, value in values.items():
+        _incr(_key(view_name, field), value)
+    _incr(_key(view_name, f'bucket:{get_bucket(total * 1000)}'), 1)
+
+
+def get_view_names():
+    """Возвращает имена view с результатами профилирования."""
+
+    count = cache.get(VIEWS_COUNT_KEY, 0)
+    return sorted(set(cache.get_many(
+        [_view_key(index) for index in range(1, count + 1)]
+    ).values()))
+
+
+def get_aggregates():
+    """Возвращает агрегаты и гистограммы времени по всем view."""
+
+    buckets = get_buckets()
+    aggregates = {}
+    for view_name in get_view_names():
+        fields = [*SUM_FIELDS, *(f'bucket:{bucket}' for bucket in buckets)]
+        values = cache.get_many([_key(view_name, field) for field in fields])
+        aggregates[view_name] = {
+            field: values.get(_key(view_name, field), 0)
+            for field in SUM_FIELDS
+        }
+        aggregates[view_name]['histogram_ms'] = {
+            bucket: values.get(_key(view_name, f'bucket:{bucket}'), 0)
+            for bucket in buckets
+        }
+    return aggregates
+
+
+def reset_aggregates():
+    buckets = get_buckets()
+    for view_name in get_view_names():
+        cache.delete_many([
+            _key(view_name, field) for field in (
+                'registered', *SUM_FIELDS,
+                *(f'bucket:{bucket}' for bucket in buckets)
+            )
+        ])
+    count = cache.get(VIEWS_COUNT_KEY, 0)
+    cache.delete_many([_view_key(index) for index in range(1, count + 1)])
+    cache.delete(VIEWS_COUNT_KEY)
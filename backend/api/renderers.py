@@ -0,0 +1,128 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+from .constants import SHOPPING_LIST_STREAM_CHUNK_SIZE
+from .utils import get_shopping_list_pdf, iter_chunks
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """
+    Базовый класс форматов выгрузки списка покупок. Формат выбирается
+    параметром запроса format или заголовком Accept, а содержимое
+    отдается по частям методом stream.
+    """
+
+    charset = 'utf-8'
+
+    def get_response(self, recipes, ingredients):
+        content_type = self.media_type
+        if self.charset:
+            content_type = f'{content_type}; charset={self.charset}'
+        response = StreamingHttpResponse(
+            self.stream(recipes, ingredients), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{self.format}"'
+        )
+        return response
+
+    def stream(self, recipes, ingredients):
+        """
+        Генератор частей документа. recipes — рецепты списка покупок,
+        ingredients — словари с названием, единицей измерения
+        и суммарным количеством ингредиента.
+        """
+
+        buffer = []
+        size = 0
+        for line in self.iter_lines(recipes, ingredients):
+            buffer.append(line)
+            size += len(line)
+            if size >= SHOPPING_LIST_STREAM_CHUNK_SIZE:
+                yield ''.join(buffer).encode(self.charset)
+                buffer = []
+                size = 0
+        if buffer:
+            yield ''.join(buffer).encode(self.charset)
+
+    def iter_lines(self, recipes, ingredients):
+        raise NotImplementedError(
+            'ShoppingListRenderer.iter_lines() must be implemented.'
+        )
+
+
+class PlainTextShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def iter_lines(self, recipes, ingredients):
+        yield 'Список покупок\n\nРецепты:\n'
+        for i, recipe in enumerate(recipes, 1):
+            yield f'{i}. {recipe.name}\n'
+
+        yield '\nИнгредиенты:\n'
+        total = 0
+        for ingredient in ingredients:
+            total += 1
+            yield (
+                f'• {ingredient["ingredient__name"]} - '
+                f'{ingredient["total_amount"]} '
+                f'{ingredient["ingredient__measurement_unit"]}\n'
+            )
+
+        yield f'\nИтого наименований ингредиентов: {total}\n'
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    class Echo:
+        """Псевдофайл, возвращающий записанную строку."""
+
+        def write(self, value):
+            return value
+
+    def iter_lines(self, recipes, ingredients):
+        writer = csv.writer(self.Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for ingredient in ingredients:
+            yield writer.writerow((
+                ingredient['ingredient__name'],
+                ingredient['ingredient__measurement_unit'],
+                ingredient['total_amount']
+            ))
+
+
+class JSONShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'application/json'
+    format = 'json'
+
+    def iter_lines(self, recipes, ingredients):
+        yield '['
+        for i, ingredient in enumerate(ingredients):
+            yield ',' if i else ''
+            yield json.dumps({
+                'name': ingredient['ingredient__name'],
+                'measurement_unit': ingredient['ingredient__measurement_unit'],
+                'amount': ingredient['total_amount']
+            }, ensure_ascii=False)
+        yield ']'
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+    def get_response(self, recipes, ingredients):
+        self.pdf = get_shopping_list_pdf(list(recipes), list(ingredients))
+        response = super().get_response(recipes, ingredients)
+        response['Content-Length'] = len(self.pdf)
+        return response
+
+    def stream(self, recipes, ingredients):
+        return iter_chunks(self.pdf)
@@ -1,10 +1,19 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
 
-from recipes.constants import MIN_INGREDIENT_AMOUNT
+from recipes.constants import MIN_INGREDIENT_AMOUNT, RECIPE_IMAGE_VARIANTS
+from recipes.images import schedule_image_variants
 from recipes.models import (
-    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag
+    Favorite, ImageUpload, Ingredient, Job, Recipe, RecipeIngredient,
+    ShoppingCart, ShoppingCartIngredient, Tag
+)
+from recipes.search import update_recipe_indexes
+from recipes.shopping_cart import apply_recipe_ingredient_deltas
+from recipes.similarity import schedule_similar_recipes_update
+from users.serializers import (
+    Base64ImageField, ImageVariantField, UserReadSerializer
 )
-from users.serializers import Base64ImageField, UserReadSerializer
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -34,6 +43,20 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class ShoppingCartIngredientSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+    amount = serializers.ReadOnlyField(source='total_amount')
+
+    class Meta:
+        model = ShoppingCartIngredient
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+        read_only_fields = fields
+
+
 class RecipeIngredientWriteSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     amount = serializers.IntegerField(min_value=MIN_INGREDIENT_AMOUNT)
@@ -45,32 +68,62 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     ingredients = RecipeIngredientSerializer(
         source='recipe_ingredients', many=True
     )
+    image_thumbnail = ImageVariantField(original='image')
+    image_card = ImageVariantField(original='image')
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
-            'id', 'name', 'author', 'tags', 'ingredients', 'image', 'text',
-            'cooking_time', 'is_favorited', 'is_in_shopping_cart'
+            'id', 'name', 'author', 'tags', 'ingredients', 'image',
+            'image_thumbnail', 'image_card', 'text', 'cooking_time',
+            'is_favorited', 'is_in_shopping_cart'
         )
         read_only_fields = fields
 
-    def get_is_favorited(self, obj):
+    def _user_relation_exists(self, obj, model):
         request = self.context['request']
         if request and request.user.is_authenticated:
-            return Favorite.objects.filter(
+            return model.objects.filter(
                 user=request.user, recipe=obj
             ).exists()
         return False
 
+    def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return self._user_relation_exists(obj, Favorite)
+
     def get_is_in_shopping_cart(self, obj):
-        request = self.context['request']
-        if request and request.user.is_authenticated:
-            return ShoppingCart.objects.filter(
-                user=request.user, recipe=obj
-            ).exists()
-        return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return self._user_relation_exists(obj, ShoppingCart)
+
+    def to_representation(self, instance):
+        # Флаг подписки на автора вычисляется в запросе рецептов,
+        # передаем его объекту автора для UserReadSerializer.
+        if hasattr(instance, 'is_author_subscribed'):
+            instance.author.is_subscribed = instance.is_author_subscribed
+        return super().to_representation(instance)
+
+
+class RecipeMatchSerializer(RecipeReadSerializer):
+    """
+    Сериализатор рецепта, подобранного по имеющимся ингредиентам.
+    Добавляет количество имеющихся и недостающих ингредиентов
+    и долю имеющихся.
+    """
+
+    matched = serializers.IntegerField(read_only=True)
+    missing = serializers.IntegerField(read_only=True)
+    coverage = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeReadSerializer.Meta):
+        fields = (
+            *RecipeReadSerializer.Meta.fields, 'matched', 'missing',
+            'coverage'
+        )
 
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
@@ -78,12 +131,15 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         queryset=Tag.objects.all(), many=True, allow_empty=False
     )
     ingredients = RecipeIngredientWriteSerializer(many=True)
-    image = Base64ImageField()
+    image = Base64ImageField(required=False)
+    image_upload = serializers.PrimaryKeyRelatedField(
+        queryset=ImageUpload.objects.all(), required=False, write_only=True
+    )
 
     class Meta:
         model = Recipe
         fields = (
-            'name', 'tags', 'ingredients', 'image', 'text',
+            'name', 'tags', 'ingredients', 'image', 'image_upload', 'text',
             'cooking_time'
         )
 
@@ -106,17 +162,67 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
                 'Ингредиенты не должны повторяться.'
             )
 
-        for ingredient in ingredients:
-            if not Ingredient.objects.filter(id=ingredient['id']).exists():
-                raise serializers.ValidationError(
-                    f'Ингредиент с id={ingredient["id"]} не найден.'
-                )
+        # Все ингредиенты загружаются одним запросом, найденные объекты
+        # сохраняются для формирования ответа без повторных запросов.
+        self.ingredient_objects = Ingredient.objects.in_bulk(ingredients_ids)
+        missing_ids = [
+            ingredient_id for ingredient_id in ingredients_ids
+            if ingredient_id not in self.ingredient_objects
+        ]
+        if missing_ids:
+            raise serializers.ValidationError([
+                f'Ингредиент с id={ingredient_id} не найден.'
+                for ingredient_id in missing_ids
+            ])
 
         return ingredients
 
+    def validate_image_upload(self, image_upload):
+        if image_upload.user != self.context['request'].user:
+            raise serializers.ValidationError('Загрузка не найдена.')
+        return image_upload
+
+    def validate(self, attrs):
+        if 'image' in attrs and 'image_upload' in attrs:
+            raise serializers.ValidationError(
+                'Передайте либо image, либо image_upload.'
+            )
+        if self.instance is None and not (
+            attrs.get('image') or 'image_upload' in attrs
+        ):
+            raise serializers.ValidationError(
+                {'image': ['Обязательное поле.']}
+            )
+        return attrs
+
+    def pop_image_upload(self, validated_data):
+        """
+        Заменяет загрузку на уже сохраненный файл изображения.
+        Файл не копируется, запись о загрузке удаляется.
+        """
+
+        image_upload = validated_data.pop('image_upload', None)
+        if image_upload is not None:
+            validated_data['image'] = image_upload.image.name
+            image_upload.delete()
+
+    def set_prefetched(self, instance, related_name, objects):
+        """
+        Сохраняет связанные объекты в кэш prefetch_related рецепта,
+        чтобы ответ формировался без повторной загрузки из базы.
+        """
+
+        queryset = getattr(instance, related_name).all()
+        queryset._result_cache = list(objects)
+        queryset._prefetch_done = True
+        if not hasattr(instance, '_prefetched_objects_cache'):
+            instance._prefetched_objects_cache = {}
+        instance._prefetched_objects_cache[related_name] = queryset
+
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
+        self.pop_image_upload(validated_data)
 
         recipe = Recipe.objects.create(
             author=self.context['request'].user,
@@ -130,14 +236,100 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             recipe_ingredients.append(
                 RecipeIngredient(
                     recipe=recipe,
-                    ingredient_id=ingredient['id'],
+                    ingredient=self.ingredient_objects[ingredient['id']],
                     amount=ingredient['amount']
                 )
             )
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
+        update_recipe_indexes((recipe.id,))
+        schedule_image_variants(recipe, 'image', RECIPE_IMAGE_VARIANTS)
+        schedule_similar_recipes_update(recipe)
+
+        self.set_prefetched(recipe, 'recipe_ingredients', recipe_ingredients)
+        # Новый рецепт еще никто не добавил в избранное и список покупок,
+        # а на себя автор подписаться не может.
+        recipe.is_favorited = False
+        recipe.is_in_shopping_cart = False
+        recipe.is_author_subscribed = False
 
         return recipe
 
+    def update_tags(self, instance, tags):
+        """
+        Добавляет и удаляет только изменившиеся теги рецепта.
+        При изменении тегов add и remove сбрасывают их кэш prefetch_related,
+        и для ответа теги загружаются заново в порядке сортировки модели.
+        Возвращает True, если набор тегов изменился.
+        """
+
+        current = {tag.id: tag for tag in instance.tags.all()}
+        new_ids = {tag.id for tag in tags}
+
+        removed = current.keys() - new_ids
+        added = [tag for tag in tags if tag.id not in current]
+        if removed:
+            instance.tags.remove(*removed)
+        if added:
+            instance.tags.add(*added)
+        return bool(removed or added)
+
+    def update_ingredients(self, instance, ingredients):
+        """
+        Сравнивает ингредиенты рецепта с переданными и выполняет запросы
+        только для удаленных, добавленных и изменивших количество строк.
+        Возвращает True, если набор ингредиентов изменился.
+        """
+
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in instance.recipe_ingredients.all()
+        }
+        new_ids = {ingredient['id'] for ingredient in ingredients}
+
+        recipe_ingredients = []
+        created = []
+        updated = []
+        # Изменение количества каждого ингредиента для списков покупок.
+        deltas = {}
+        for ingredient in ingredients:
+            recipe_ingredient = current.get(ingredient['id'])
+            if recipe_ingredient is None:
+                recipe_ingredient = RecipeIngredient(
+                    recipe=instance,
+                    ingredient=self.ingredient_objects[ingredient['id']],
+                    amount=ingredient['amount']
+                )
+                created.append(recipe_ingredient)
+                deltas[ingredient['id']] = ingredient['amount']
+            elif recipe_ingredient.amount != ingredient['amount']:
+                deltas[ingredient['id']] = (
+                    ingredient['amount'] - recipe_ingredient.amount
+                )
+                recipe_ingredient.amount = ingredient['amount']
+                updated.append(recipe_ingredient)
+            recipe_ingredients.append(recipe_ingredient)
+
+        removed = current.keys() - new_ids
+        for ingredient_id in removed:
+            deltas[ingredient_id] = -current[ingredient_id].amount
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=instance, ingredient_id__in=removed
+            ).delete()
+        if updated:
+            RecipeIngredient.objects.bulk_update(updated, ('amount',))
+        if created:
+            RecipeIngredient.objects.bulk_create(created)
+
+        apply_recipe_ingredient_deltas(instance.id, deltas)
+
+        # Порядок совпадает с порядком при чтении рецепта (по id строки).
+        self.set_prefetched(
+            instance, 'recipe_ingredients',
+            sorted(recipe_ingredients, key=lambda item: item.id)
+        )
+        return bool(created or removed)
+
     def update(self, instance, validated_data):
         if 'tags' not in self.initial_data:
             raise serializers.ValidationError({'tags': ['Обязательное поле']})
@@ -149,21 +341,20 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
 
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
+        self.pop_image_upload(validated_data)
 
-        instance = super().update(instance, validated_data)
-        instance.tags.set(tags)
-        instance.recipe_ingredients.all().delete()
-
-        recipe_ingredients = []
-        for ingredient in ingredients:
-            recipe_ingredients.append(
-                RecipeIngredient(
-                    recipe=instance,
-                    ingredient_id=ingredient['id'],
-                    amount=ingredient['amount']
-                )
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            tags_changed = self.update_tags(instance, tags)
+            ingredients_changed = self.update_ingredients(
+                instance, ingredients
             )
-        RecipeIngredient.objects.bulk_create(recipe_ingredients)
+            # Поисковый вектор зависит и от названия и описания рецепта.
+            update_recipe_indexes((instance.id,))
+            if tags_changed or ingredients_changed:
+                schedule_similar_recipes_update(instance)
+        if 'image' in validated_data:
+            schedule_image_variants(instance, 'image', RECIPE_IMAGE_VARIANTS)
 
         return instance
 
@@ -171,10 +362,37 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         return RecipeReadSerializer(instance, context=self.context).data
 
 
+class ImageUploadSerializer(serializers.ModelSerializer):
+    """Сериализатор для загрузки изображения файлом."""
+
+    class Meta:
+        model = ImageUpload
+        fields = ('id', 'image')
+        read_only_fields = ('id',)
+
+    def validate_image(self, image):
+        if image.size > settings.IMAGE_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Размер изображения превышает {settings.IMAGE_MAX_SIZE} байт.'
+            )
+        return image
+
+
 class RecipeMinifiedSerializer(serializers.ModelSerializer):
     """Сериализатор для краткого отображения рецепта."""
 
+    image_thumbnail = ImageVariantField(original='image')
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_thumbnail', 'cooking_time')
+        read_only_fields = fields
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Сериализатор для отображения состояния фоновой задачи."""
+
+    class Meta:
+        model = Job
+        fields = ('id', 'kind', 'status', 'result', 'created', 'finished')
         read_only_fields = fields
@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.jobs import claim_job, run_job
+from recipes.models import Recipe
+from recipes.trending import rebuild_trending_scores
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    """
+    Счетчики рецептов и пользователей и популярность за последнее время
+    поддерживаются сигналами и должны совпадать с пересчетом с нуля.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Автор', last_name='Авторов', password='password'
+        )
+        cls.users = [
+            User.objects.create_user(
+                email=f'user{index}@example.com', username=f'user{index}',
+                first_name='Пользователь', last_name='Пользователев',
+                password='password'
+            )
+            for index in range(3)
+        ]
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Описание',
+            cooking_time=10
+        )
+
+    def get_client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def assert_trending_score_rebuilt(self):
+        score = Recipe.objects.get(pk=self.recipe.pk).trending_score
+        rebuild_trending_scores((self.recipe.pk,))
+        self.assertAlmostEqual(
+            score, Recipe.objects.get(pk=self.recipe.pk).trending_score
+        )
+
+    def test_favorites_count(self):
+        for user in self.users:
+            response = self.get_client(user).post(
+                f'/api/recipes/{self.recipe.pk}/favorite/'
+            )
+            self.assertEqual(response.status_code, 201)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, len(self.users))
+        self.assert_trending_score_rebuilt()
+
+        response = self.get_client(self.users[0]).delete(
+            f'/api/recipes/{self.recipe.pk}/favorite/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, len(self.users) - 1)
+        self.assert_trending_score_rebuilt()
+
+    def test_shopping_carts_count(self):
+        client = self.get_client(self.users[0])
+        client.post(f'/api/recipes/{self.recipe.pk}/shopping_cart/')
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.shopping_carts_count, 1)
+        self.assert_trending_score_rebuilt()
+
+        # Вклад единственного события равен всей популярности, поэтому
+        # она пересчитывается фоновой задачей.
+        with self.captureOnCommitCallbacks(execute=True):
+            client.delete(f'/api/recipes/{self.recipe.pk}/shopping_cart/')
+        while job := claim_job():
+            run_job(job)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.shopping_carts_count, 0)
+        self.assertEqual(self.recipe.trending_score, 0)
+
+    def test_followers_count(self):
+        for user in self.users:
+            response = self.get_client(user).post(
+                f'/api/users/{self.author.pk}/subscribe/'
+            )
+            self.assertEqual(response.status_code, 201)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, len(self.users))
+
+        self.get_client(self.users[0]).delete(
+            f'/api/users/{self.author.pk}/subscribe/'
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, len(self.users) - 1)
+
+    def test_recipes_count(self):
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 1)
+
+        Recipe.objects.create(
+            author=self.author, name='Второй рецепт', text='Описание',
+            cooking_time=5
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 2)
+
+        response = self.get_client(self.author).delete(
+            f'/api/recipes/{self.recipe.pk}/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 1)
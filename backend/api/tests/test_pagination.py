@@ -0,0 +1,150 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from recipes.search import update_recipe_indexes
+from users.models import Subscription
+from .. import pagination
+
+User = get_user_model()
+
+
+def create_user(username):
+    return User.objects.create_user(
+        email=f'{username}@example.com', username=username,
+        first_name='Имя', last_name='Фамилия', password='password'
+    )
+
+
+class CursorPaginationTest(TestCase):
+    """
+    Обход списка рецептов по курсору выдает те же рецепты в том же
+    порядке, что и постраничный режим.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        recipes = [
+            Recipe.objects.create(
+                author=author, name='Тыква ' * (1 + index % 3),
+                text='Суп. ' * (index % 2), cooking_time=10
+            )
+            for index in range(9)
+        ]
+        # Рецепты с одинаковой датой упорядочиваются по id.
+        Recipe.objects.filter(
+            pk__in=[recipe.pk for recipe in recipes[:4]]
+        ).update(created=recipes[0].created)
+        update_recipe_indexes([recipe.pk for recipe in recipes])
+
+    def get_ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def walk(self, params):
+        client = APIClient()
+        response = client.get(
+            '/api/recipes/', {**params, 'limit': 2, 'cursor': ''}
+        )
+        ids = self.get_ids(response)
+        while response.data['next']:
+            response = client.get(response.data['next'])
+            ids += self.get_ids(response)
+        return ids
+
+    def assert_same_order(self, params):
+        ids = self.get_ids(
+            APIClient().get('/api/recipes/', {**params, 'limit': 50})
+        )
+        self.assertTrue(ids)
+        self.assertEqual(self.walk(params), ids)
+
+    def test_default_ordering(self):
+        self.assert_same_order({})
+
+    def test_search_ordering(self):
+        self.assert_same_order({'search': 'тыква'})
+        self.assert_same_order({'search': 'тыква суп'})
+
+    def test_popular_ordering(self):
+        self.assert_same_order({'ordering': 'popular'})
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+class FeedPaginationTest(TestCase):
+    """
+    Лента объединяет записи ленты и рецепты авторов с большим числом
+    подписчиков и выдается от новых рецептов к старым.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('user')
+        other_user = create_user('other')
+        authors = [create_user(f'author{index}') for index in range(3)]
+        for index in range(12):
+            Recipe.objects.create(
+                author=authors[index % len(authors)],
+                name=f'Рецепт {index}', text='Описание', cooking_time=10
+            )
+        # Рецепты последнего автора выбираются при чтении ленты: у него
+        # больше FEED_FANOUT_MAX_FOLLOWERS подписчиков.
+        Subscription.objects.create(user=other_user, author=authors[-1])
+        for author in authors:
+            Subscription.objects.create(user=cls.user, author=author)
+        Recipe.objects.create(
+            author=create_user('stranger'), name='Чужой рецепт',
+            text='Описание', cooking_time=10
+        )
+        cls.expected = list(
+            Recipe.objects.filter(author__in=authors).order_by(
+                '-created', '-id'
+            ).values_list('pk', flat=True)
+        )
+
+    def walk(self, limit):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(
+            '/api/recipes/feed/', {'limit': limit, 'cursor': ''}
+        )
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            if not response.data['next']:
+                return ids
+            response = client.get(response.data['next'])
+
+    def test_ordering(self):
+        for limit in (1, 5, len(self.expected)):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.walk(limit), self.expected)
+
+    def test_page_of_deleted_recipes(self):
+        """
+        Рецепты страницы удалены после выборки ленты: страница пуста,
+        но лента продолжается со следующей.
+        """
+
+        get_feed_entries = pagination.get_feed_entries
+        pages = []
+
+        def delete_second_page(user, limit, cursor=None):
+            entries = get_feed_entries(user, limit, cursor)
+            pages.append(entries)
+            if len(pages) == 2:
+                Recipe.objects.filter(
+                    pk__in=[recipe_id for _, recipe_id in entries[:limit - 1]]
+                ).delete()
+            return entries
+
+        with mock.patch.object(
+            pagination, 'get_feed_entries', delete_second_page
+        ):
+            ids = self.walk(3)
+        self.assertEqual(ids, self.expected[:3] + self.expected[6:])
@@ -0,0 +1,137 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Ingredient, Recipe, RecipeIngredient, ShoppingCart, ShoppingCartIngredient,
+    Tag
+)
+
+User = get_user_model()
+
+
+class ShoppingCartTotalsTest(TestCase):
+    """
+    Суммарные количества ингредиентов списка покупок изменяются
+    по разностям и должны совпадать с суммой по рецептам списка.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.user, cls.other_user = [
+            User.objects.create_user(
+                email=f'{username}@example.com', username=username,
+                first_name='Имя', last_name='Фамилия', password='password'
+            )
+            for username in ('author', 'user', 'other')
+        ]
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {index}', measurement_unit='г'
+            )
+            for index in range(4)
+        ]
+        cls.recipe = cls.create_recipe(
+            'Рецепт', {cls.ingredients[0]: 100, cls.ingredients[1]: 50}
+        )
+        cls.other_recipe = cls.create_recipe(
+            'Другой рецепт', {cls.ingredients[0]: 30, cls.ingredients[2]: 10}
+        )
+
+    @classmethod
+    def create_recipe(cls, name, amounts):
+        recipe = Recipe.objects.create(
+            author=cls.author, name=name, text='Описание', cooking_time=10
+        )
+        recipe.tags.set((cls.tag,))
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+            for ingredient, amount in amounts.items()
+        )
+        return recipe
+
+    def setUp(self):
+        self.clients = {}
+        for user in (self.author, self.user, self.other_user):
+            self.clients[user] = APIClient()
+            self.clients[user].force_authenticate(user)
+        self.add_to_cart(self.user, self.recipe)
+        self.add_to_cart(self.user, self.other_recipe)
+        self.add_to_cart(self.other_user, self.recipe)
+
+    def add_to_cart(self, user, recipe):
+        response = self.clients[user].post(
+            f'/api/recipes/{recipe.pk}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def update_recipe(self, amounts):
+        response = self.clients[self.author].patch(
+            f'/api/recipes/{self.recipe.pk}/',
+            {
+                'tags': [self.tag.pk],
+                'ingredients': [
+                    {'id': ingredient.pk, 'amount': amount}
+                    for ingredient, amount in amounts.items()
+                ],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def assert_totals(self):
+        for user in (self.user, self.other_user):
+            expected = defaultdict(int)
+            for ingredient_id, amount in RecipeIngredient.objects.filter(
+                recipe__in=ShoppingCart.objects.filter(
+                    user=user
+                ).values('recipe')
+            ).values_list('ingredient', 'amount'):
+                expected[ingredient_id] += amount
+            self.assertEqual(
+                dict(
+                    ShoppingCartIngredient.objects.filter(
+                        user=user
+                    ).values_list('ingredient', 'total_amount')
+                ),
+                expected
+            )
+
+    def test_cart_changes(self):
+        self.assert_totals()
+
+        self.clients[self.user].delete(
+            f'/api/recipes/{self.other_recipe.pk}/shopping_cart/'
+        )
+        self.assert_totals()
+
+    def test_recipe_update(self):
+        """
+        Количество одного ингредиента уменьшается, другой удаляется,
+        добавляются ингредиент, уже входящий в список покупок, и новый.
+        """
+
+        self.update_recipe({
+            self.ingredients[0]: 40,
+            self.ingredients[2]: 5,
+            self.ingredients[3]: 7,
+        })
+        self.assert_totals()
+
+        self.update_recipe({
+            self.ingredients[0]: 200,
+            self.ingredients[2]: 5,
+        })
+        self.assert_totals()
+
+    def test_recipe_deletion(self):
+        response = self.clients[self.author].delete(
+            f'/api/recipes/{self.recipe.pk}/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assert_totals()
@@ -2,7 +2,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from users.views import SubscriptionViewSet, UserViewSet, set_avatar
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+from .views import IngredientViewSet, JobViewSet, RecipeViewSet, TagViewSet
 
 app_name = 'api'
 
@@ -11,6 +11,7 @@ router.register('users', UserViewSet, basename='user')
 router.register('tags', TagViewSet, basename='tag')
 router.register('ingredients', IngredientViewSet, basename='ingredient')
 router.register('recipes', RecipeViewSet, basename='recipe')
+router.register('jobs', JobViewSet, basename='job')
 
 
 urlpatterns = [
@@ -1,5 +1,8 @@
+import hashlib
 import io
 
+from django.conf import settings
+from django.core.cache import cache
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFError, TTFont
@@ -7,24 +10,41 @@ from reportlab.pdfgen import canvas
 
 from .constants import (
     BOTTOM_MARGIN, DOUBLE_LINE_HEIGHT, FONT_SIZE, LEFT_MARGIN, LINE_HEIGHT,
-    PARAGRAPH_INDENTATION, RECIPE_TITLE_LIMIT, RIGHT_MARGIN, TITLE_FONT_SIZE,
-    TOP_MARGIN
+    PARAGRAPH_INDENTATION, PDF_CHUNK_SIZE, PDF_FALLBACK_FONT_NAME,
+    PDF_FONT_FILE, PDF_FONT_NAME, RECIPE_TITLE_LIMIT, RIGHT_MARGIN,
+    SHOPPING_LIST_CACHE_PREFIX, TITLE_FONT_SIZE, TOP_MARGIN
 )
 
+pdf_font_name = PDF_FALLBACK_FONT_NAME
 
-def generate_shopping_list_pdf(recipes_queryset, ingredients_queryset):
+
+def register_pdf_fonts():
+    """
+    Функция однократно регистрирует шрифт с поддержкой кириллицы.
+    Вызывается при запуске приложения.
+    """
+
+    global pdf_font_name
+
+    if PDF_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        pdf_font_name = PDF_FONT_NAME
+        return
+
+    try:
+        pdfmetrics.registerFont(TTFont(
+            PDF_FONT_NAME, settings.BASE_DIR / PDF_FONT_FILE
+        ))
+        pdf_font_name = PDF_FONT_NAME
+    except TTFError:
+        pdf_font_name = PDF_FALLBACK_FONT_NAME
+
+
+def generate_shopping_list_pdf(recipes, ingredients):
     """Функция генерирует PDF со списком покупок."""
 
     with io.BytesIO() as buffer:
         pdf = canvas.Canvas(buffer, pagesize=A4)
-
-        try:
-            pdfmetrics.registerFont(TTFont(
-                'DejaVu', 'docs/DejaVuSans.ttf'
-            ))
-            font_name = 'DejaVu'
-        except TTFError:
-            font_name = 'Helvetica'
+        font_name = pdf_font_name
 
         y = TOP_MARGIN
 
@@ -36,7 +56,7 @@ def generate_shopping_list_pdf(recipes_queryset, ingredients_queryset):
         pdf.drawString(LEFT_MARGIN, y, 'Рецепты:')
         y -= LINE_HEIGHT
 
-        for i, recipe in enumerate(recipes_queryset, 1):
+        for i, recipe in enumerate(recipes, 1):
             if y < BOTTOM_MARGIN:
                 pdf.showPage()
                 pdf.setFont(font_name, FONT_SIZE)
@@ -55,7 +75,7 @@ def generate_shopping_list_pdf(recipes_queryset, ingredients_queryset):
         pdf.drawString(LEFT_MARGIN, y, 'Ингредиенты:')
         y -= LINE_HEIGHT
 
-        for ingredient in ingredients_queryset:
+        for ingredient in ingredients:
             if y < BOTTOM_MARGIN:
                 pdf.showPage()
                 pdf.setFont(font_name, FONT_SIZE)
@@ -75,7 +95,7 @@ def generate_shopping_list_pdf(recipes_queryset, ingredients_queryset):
 
         pdf.drawString(
             LEFT_MARGIN, y,
-            f'Итого наименований ингредиентов: {ingredients_queryset.count()}'
+            f'Итого наименований ингредиентов: {len(ingredients)}'
         )
         y -= DOUBLE_LINE_HEIGHT
 
@@ -85,6 +105,48 @@ def generate_shopping_list_pdf(recipes_queryset, ingredients_queryset):
         )
 
         pdf.save()
-        buffer.seek(0)
-
         return buffer.getvalue()
+
+
+def get_shopping_list_hash(recipes, ingredients):
+    """
+    Функция возвращает хэш содержимого списка покупок.
+    Одинаковые списки покупок дают одинаковый хэш.
+    """
+
+    digest = hashlib.sha256()
+    for recipe in recipes:
+        digest.update(f'{recipe.id}:{recipe.name}\n'.encode())
+    for ingredient in ingredients:
+        digest.update((
+            f'{ingredient["ingredient__name"]}:'
+            f'{ingredient["ingredient__measurement_unit"]}:'
+            f'{ingredient["total_amount"]}\n'
+        ).encode())
+    return digest.hexdigest()
+
+
+def get_shopping_list_pdf(recipes, ingredients):
+    """
+    Функция возвращает PDF со списком покупок из кэша,
+    генерируя его только для нового содержимого списка.
+    """
+
+    cache_key = (
+        f'{SHOPPING_LIST_CACHE_PREFIX}:'
+        f'{get_shopping_list_hash(recipes, ingredients)}'
+    )
+    pdf = cache.get(cache_key)
+
+    if pdf is None:
+        pdf = generate_shopping_list_pdf(recipes, ingredients)
+        cache.set(cache_key, pdf, settings.SHOPPING_LIST_CACHE_TIMEOUT)
+
+    return pdf
+
+
+def iter_chunks(content, chunk_size=PDF_CHUNK_SIZE):
+    """Генератор отдает содержимое файла частями для потоковой передачи."""
+
+    for start in range(0, len(content), chunk_size):
+        yield content[start:start + chunk_size]
@@ -1,67 +1,206 @@
 from django.conf import settings
-from django.db.models import Prefetch, Sum
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.db.models import BooleanField, Exists, F, OuterRef, Prefetch, Value
 from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.mixins import RetrieveModelMixin
+from rest_framework.parsers import FileUploadParser, MultiPartParser
 from rest_framework.permissions import (
     IsAuthenticated, IsAuthenticatedOrReadOnly
 )
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
-from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from rest_framework.viewsets import (
+    GenericViewSet, ModelViewSet, ReadOnlyModelViewSet
+)
 
+from recipes.jobs import enqueue_job
 from recipes.models import (
-    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag
+    Favorite, Ingredient, Job, Recipe, RecipeIngredient, ShoppingCart,
+    ShoppingCartIngredient, Tag
+)
+from recipes.search import match_by_ingredients
+from recipes.utils import get_short_link_cache_key
+from users.models import Subscription
+from .autocomplete import ingredient_index
+from .constants import (
+    AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_LIMIT, MATCH_INGREDIENTS_QUERY_PARAM,
+    MATCH_MAX_INGREDIENTS, MATCH_ORDERING, SHOPPING_LIST_ASYNC_QUERY_PARAM,
+    SHOPPING_LIST_FETCH_SIZE, SHOPPING_LIST_PDF_JOB
 )
 from .filters import IngredientFilter, RecipeFilter
+from .mixins import CatalogCacheMixin
+from .pagination import FeedPagination, MatchPagination, RecipePagination
 from .permissions import IsAuthorOrReadOnly
+from .renderers import (
+    CSVShoppingListRenderer, JSONShoppingListRenderer, PDFShoppingListRenderer,
+    PlainTextShoppingListRenderer
+)
 from .serializers import (
-    IngredientSerializer, RecipeMinifiedSerializer, RecipeReadSerializer,
-    RecipeWriteSerializer, TagSerializer
+    ImageUploadSerializer, IngredientSerializer, JobSerializer,
+    RecipeMatchSerializer, RecipeMinifiedSerializer, RecipeReadSerializer,
+    RecipeWriteSerializer, ShoppingCartIngredientSerializer, TagSerializer
 )
-from .utils import generate_shopping_list_pdf
+from .utils import get_shopping_list_hash
 
 
 def redirect_from_short_link(request, token):
-    """Редирект с короткой ссылки на страницу рецепта."""
+    """
+    Редирект с короткой ссылки на страницу рецепта.
+    Соответствие токена рецепту кэшируется, поэтому повторные переходы
+    по ссылке не обращаются к базе данных.
+    """
+
+    cache_key = get_short_link_cache_key(token)
+    recipe_id = cache.get(cache_key)
 
-    recipe = get_object_or_404(Recipe, short_link_token=token)
-    return redirect(f'{settings.HOST_NAME}/recipes/{recipe.id}/')
+    if recipe_id is None:
+        recipe_id = get_object_or_404(
+            Recipe.objects.values_list('id', flat=True),
+            short_link_token=token
+        )
+        cache.set(cache_key, recipe_id, settings.SHORT_LINK_CACHE_TIMEOUT)
+
+    return redirect(f'{settings.HOST_NAME}/recipes/{recipe_id}/')
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(CatalogCacheMixin, ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(CatalogCacheMixin, ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    @action(methods=('GET',), detail=False)
+    def autocomplete(self, request):
+        """
+        Подсказки ингредиентов по части названия: сначала совпадения
+        по началу названия, затем по вхождению в середине.
+        """
+
+        try:
+            limit = min(
+                int(request.query_params.get('limit', AUTOCOMPLETE_LIMIT)),
+                AUTOCOMPLETE_MAX_LIMIT
+            )
+        except ValueError:
+            limit = AUTOCOMPLETE_LIMIT
+
+        return Response(ingredient_index.search(
+            request.query_params.get('name', ''), max(limit, 1)
+        ))
+
+
+class JobViewSet(RetrieveModelMixin, GenericViewSet):
+    """
+    Состояние фоновой задачи и ссылка на ее результат. Доступны только
+    задачи формирования списка покупок, поставленные пользователем.
+    """
+
+    serializer_class = JobSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return Job.objects.filter(
+            kind=SHOPPING_LIST_PDF_JOB, user=self.request.user
+        )
+
 
 class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.select_related('author').prefetch_related(
+    queryset = Recipe.objects.select_related('author').defer(
+        'search_vector', 'ingredient_ids'
+    ).prefetch_related(
         Prefetch(
             'recipe_ingredients',
-            queryset=RecipeIngredient.objects.select_related('ingredient')
+            queryset=RecipeIngredient.objects.select_related(
+                'ingredient'
+            ).order_by('id')
         ), 'tags'
     )
     http_method_names = ('get', 'post', 'patch', 'delete', 'head', 'options')
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    pagination_class = RecipePagination
+
+    def get_queryset(self):
+        """
+        Добавляет к рецептам флаги избранного, списка покупок и подписки
+        на автора, чтобы сериализатор не выполнял запросы для каждого рецепта.
+        """
+
+        queryset = super().get_queryset()
+        user = self.request.user
+
+        if not user.is_authenticated:
+            false = Value(False, output_field=BooleanField())
+            return queryset.annotate(
+                is_favorited=false,
+                is_in_shopping_cart=false,
+                is_author_subscribed=false
+            )
+
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_author_subscribed=Exists(
+                Subscription.objects.filter(
+                    user=user, author=OuterRef('author')
+                )
+            )
+        )
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'feed', 'similar'):
             return RecipeReadSerializer
+        if self.action == 'match':
+            return RecipeMatchSerializer
         return RecipeWriteSerializer
 
+    def update(self, request, *args, **kwargs):
+        """
+        В отличие от UpdateModelMixin.update не сбрасывает кэш
+        prefetch_related: сериализатор сам заполняет его актуальными
+        тегами и ингредиентами, и ответ формируется без запросов к базе.
+        """
+
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(
+            instance, data=request.data, partial=partial
+        )
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
+
+    def handle_exception(self, exc):
+        """
+        Ошибки выгрузки списка покупок возвращаются в JSON,
+        а не в формате запрошенного документа.
+        """
+
+        if self.action == 'download_shopping_cart':
+            self.use_json_renderer()
+        return super().handle_exception(exc)
+
+    def use_json_renderer(self):
+        self.request.accepted_renderer = JSONRenderer()
+        self.request.accepted_media_type = JSONRenderer.media_type
+
     def _handle_recipe_relation(self, request, pk, model, action_name):
         """Обработчик для операций с рецептами (избранное, список покупок)."""
 
@@ -90,6 +229,101 @@ class RecipeViewSet(ModelViewSet):
             relation.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        methods=('POST',), detail=False, url_path='upload-image',
+        permission_classes=(IsAuthenticated,),
+        parser_classes=(MultiPartParser, FileUploadParser)
+    )
+    def upload_image(self, request):
+        """
+        Загрузка изображения файлом: полем image формы multipart/form-data
+        или телом запроса с заголовком Content-Disposition. Файл
+        записывается на диск обработчиками загрузки Django по частям.
+        Возвращает идентификатор для поля image_upload рецепта.
+        """
+
+        image = request.data.get('image', request.data.get('file'))
+        serializer = ImageUploadSerializer(
+            data={'image': image}, context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(
+        methods=('GET',), detail=False, pagination_class=MatchPagination
+    )
+    def match(self, request):
+        """
+        Подбор рецептов по имеющимся ингредиентам. Идентификаторы
+        ингредиентов передаются параметром ingredients (повторяющимся
+        или через запятую). Рецепты упорядочены по доле имеющихся
+        ингредиентов, затем по количеству недостающих.
+        """
+
+        try:
+            ingredient_ids = {
+                int(value)
+                for values in request.query_params.getlist(
+                    MATCH_INGREDIENTS_QUERY_PARAM
+                )
+                for value in values.split(',') if value
+            }
+        except ValueError:
+            raise ValidationError(
+                {MATCH_INGREDIENTS_QUERY_PARAM: ['Ожидаются целые числа.']}
+            )
+
+        if not ingredient_ids:
+            raise ValidationError(
+                {MATCH_INGREDIENTS_QUERY_PARAM: ['Обязательный параметр.']}
+            )
+        if len(ingredient_ids) > MATCH_MAX_INGREDIENTS:
+            raise ValidationError({
+                MATCH_INGREDIENTS_QUERY_PARAM: [
+                    f'Не больше {MATCH_MAX_INGREDIENTS} ингредиентов.'
+                ]
+            })
+
+        queryset = match_by_ingredients(
+            self.filter_queryset(self.get_queryset()), sorted(ingredient_ids)
+        ).order_by(*MATCH_ORDERING)
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        methods=('GET',), detail=False,
+        permission_classes=(IsAuthenticated,),
+        pagination_class=FeedPagination
+    )
+    def feed(self, request):
+        """
+        Лента рецептов авторов, на которых подписан пользователь,
+        от новых к старым. Следующая страница запрашивается по ссылке next.
+        """
+
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(methods=('GET',), detail=True)
+    def similar(self, request, pk=None):
+        """
+        Рецепты, похожие по ингредиентам и тегам, от более похожих
+        к менее похожим. Список вычисляется заранее фоновой задачей.
+        """
+
+        recipe = get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        queryset = self.get_queryset().filter(
+            similar_to__recipe=recipe
+        ).annotate(
+            similarity=F('similar_to__score')
+        ).order_by('-similarity', '-id')
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
     @action(methods=('GET',), detail=True, url_path='get-link')
     def get_short_link(self, request, pk=None):
         recipe = get_object_or_404(Recipe, pk=pk)
@@ -121,28 +355,85 @@ class RecipeViewSet(ModelViewSet):
         methods=('GET',), detail=False,
         permission_classes=(IsAuthenticated,)
     )
+    def shopping_cart_ingredients(self, request):
+        """Суммарный список ингредиентов из списка покупок."""
+
+        serializer = ShoppingCartIngredientSerializer(
+            ShoppingCartIngredient.objects.filter(user=request.user)
+            .select_related('ingredient')
+            .order_by('ingredient__name'),
+            many=True
+        )
+        return Response(serializer.data)
+
+    @action(
+        methods=('GET',), detail=False,
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            PDFShoppingListRenderer, PlainTextShoppingListRenderer,
+            CSVShoppingListRenderer, JSONShoppingListRenderer
+        )
+    )
     def download_shopping_cart(self, request):
-        """Скачивание списка покупок в формате PDF."""
+        """
+        Скачивание списка покупок в формате PDF (по умолчанию),
+        TXT, CSV или JSON. Формат выбирается параметром format или
+        заголовком Accept. Текстовые форматы читаются из базы курсором
+        и отдаются по частям, не собирая документ в памяти.
+        """
 
-        shopping_cart = ShoppingCart.objects.filter(
-            user=request.user
-        ).select_related('recipe')
+        recipes = Recipe.objects.filter(
+            shoppingcart_set__user=request.user
+        ).only('id', 'name').order_by('id')
 
-        if not shopping_cart.exists():
+        if not recipes.exists():
             raise ValidationError('Список покупок пуст.')
 
-        recipes = [item.recipe for item in shopping_cart]
-
         ingredients = (
-            RecipeIngredient.objects.filter(recipe__in=recipes)
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .annotate(total_amount=Sum('amount'))
+            ShoppingCartIngredient.objects.filter(user=request.user)
+            .values(
+                'ingredient__name', 'ingredient__measurement_unit',
+                'total_amount'
+            )
             .order_by('ingredient__name')
         )
 
-        pdf = generate_shopping_list_pdf(recipes, ingredients)
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = (
-            'attachment; filename="shopping_list.pdf"'
+        if (
+            request.accepted_renderer.format == 'pdf'
+            and request.query_params.get(SHOPPING_LIST_ASYNC_QUERY_PARAM)
+        ):
+            return self.enqueue_shopping_list_pdf(
+                list(recipes), list(ingredients)
+            )
+
+        return request.accepted_renderer.get_response(
+            recipes.iterator(chunk_size=SHOPPING_LIST_FETCH_SIZE),
+            ingredients.iterator(chunk_size=SHOPPING_LIST_FETCH_SIZE)
+        )
+
+    def enqueue_shopping_list_pdf(self, recipes, ingredients):
+        """
+        Ставит формирование PDF в очередь фоновых задач и возвращает
+        ответ 202 со ссылкой на задачу. Для одинаковых списков покупок
+        пользователя используется одна задача и один файл.
+        """
+
+        job = enqueue_job(
+            SHOPPING_LIST_PDF_JOB,
+            f'{self.request.user.pk}:'
+            f'{get_shopping_list_hash(recipes, ingredients)}',
+            {
+                'recipes': [[recipe.id, recipe.name] for recipe in recipes],
+                'ingredients': ingredients
+            },
+            reuse_result=True,
+            user=self.request.user
+        )
+        self.use_json_renderer()
+        serializer = JobSerializer(job, context={'request': self.request})
+        return Response(
+            serializer.data, status=status.HTTP_202_ACCEPTED,
+            headers={'Location': self.request.build_absolute_uri(
+                reverse('api:job-detail', args=(job.id,))
+            )}
         )
-        return response
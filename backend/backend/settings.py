@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -39,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,6 +83,18 @@ DATABASES = {
     }
 }
 
+# Кэш общий для всех процессов: в нем хранятся версия справочников
+# и результаты профилирования, которые изменяются и читаются
+# веб-сервером и командами manage.py
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.redis.RedisCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'redis://cache:6379'),
+    }
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,6 +128,15 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/media'
 
+# Максимальный размер загружаемого изображения (в байтах)
+IMAGE_MAX_SIZE = int(os.getenv('IMAGE_MAX_SIZE', 5 * 1024 * 1024))
+
+# Максимальный размер тела запроса, совпадает с client_max_body_size nginx
+DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+
+# Количество потоков для создания уменьшенных копий изображений
+IMAGE_PROCESSING_WORKERS = int(os.getenv('IMAGE_PROCESSING_WORKERS', 2))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
@@ -136,3 +159,51 @@ RESERVED_USERNAME = 'me'
 
 # Host name для генерации короткой ссылки
 HOST_NAME = os.getenv('HOST_NAME')
+
+# Время хранения соответствия токена короткой ссылки рецепту (в секундах)
+SHORT_LINK_CACHE_TIMEOUT = int(
+    os.getenv('SHORT_LINK_CACHE_TIMEOUT', 30 * 24 * 60 * 60)
+)
+
+# Время хранения сгенерированного PDF со списком покупок (в секундах)
+SHOPPING_LIST_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_LIST_CACHE_TIMEOUT', 60 * 60)
+)
+
+# Рецепты авторов с большим числом подписчиков не рассылаются по лентам,
+# а добавляются в ленту при ее чтении
+FEED_FANOUT_MAX_FOLLOWERS = int(
+    os.getenv('FEED_FANOUT_MAX_FOLLOWERS', 10000)
+)
+
+# Время, за которое вклад добавления рецепта в избранное или список покупок
+# в популярность за последнее время уменьшается вдвое (в секундах)
+TRENDING_HALF_LIFE = int(os.getenv('TRENDING_HALF_LIFE', 3 * 24 * 60 * 60))
+
+# Время кэширования справочников тегов и ингредиентов клиентами (в секундах)
+CATALOG_CACHE_MAX_AGE = int(os.getenv('CATALOG_CACHE_MAX_AGE', 60))
+
+# Время хранения ответов справочников в общем кэше (в секундах)
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 60 * 60))
+
+# Профилирование запросов: доля профилируемых запросов (0 — выключено)
+# и добавление заголовка Server-Timing в ответы профилируемых запросов
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_SERVER_TIMING = os.getenv('PROFILING_SERVER_TIMING', False) == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -1,10 +1,14 @@
 from django.contrib import admin
-from django.db.models import Count, Prefetch
+from django.db.models import Prefetch
 
+from .constants import RECIPE_IMAGE_VARIANTS
 from .forms import RecipeIngredientFormSet
+from .images import schedule_image_variants
 from .models import (
     Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag
 )
+from .search import update_recipe_indexes
+from .shopping_cart import refresh_recipe_in_shopping_carts
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -29,6 +33,7 @@ class IngredientAdmin(admin.ModelAdmin):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('name', 'author', 'text', 'created', 'favorites_count')
+    readonly_fields = ('favorites_count', 'shopping_carts_count')
     search_fields = ('name', 'author__username')
     list_filter = ('tags', 'created')
     inlines = (RecipeIngredientInline,)
@@ -40,13 +45,23 @@ class RecipeAdmin(admin.ModelAdmin):
             Prefetch(
                 'recipe_ingredients',
                 queryset=RecipeIngredient.objects.select_related('ingredient')
-            ), 'tags').annotate(favorite_count=Count('favorite_set'))
+            ), 'tags')
 
-    @admin.display(
-        description='Добавлений в избранное'
-    )
-    def favorites_count(self, obj):
-        return obj.favorite_count
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data:
+            schedule_image_variants(obj, 'image', RECIPE_IMAGE_VARIANTS)
+
+    def save_related(self, request, form, formsets, change):
+        """
+        После сохранения ингредиентов рецепта пересчитывает списки покупок
+        с этим рецептом и поисковый вектор и массив ингредиентов рецепта.
+        В API это делает сериализатор рецепта.
+        """
+
+        super().save_related(request, form, formsets, change)
+        refresh_recipe_in_shopping_carts(form.instance.pk)
+        update_recipe_indexes((form.instance.pk,))
 
 
 @admin.register(Favorite)
@@ -0,0 +1,25 @@
+import time
+
+from django.core.cache import cache
+
+from .constants import CATALOG_VERSION_CACHE_KEY
+
+
+def get_catalog_version():
+    """
+    Функция возвращает текущую версию справочников тегов и ингредиентов.
+    Начальное значение берется из текущего времени, чтобы после вытеснения
+    ключа из кэша версия не совпала ни с одной из выданных ранее.
+    """
+
+    cache.add(CATALOG_VERSION_CACHE_KEY, time.time_ns(), None)
+    return cache.get(CATALOG_VERSION_CACHE_KEY)
+
+
+def bump_catalog_version():
+    """Функция увеличивает версию справочников после их изменения."""
+
+    try:
+        return cache.incr(CATALOG_VERSION_CACHE_KEY)
+    except ValueError:
+        return get_catalog_version()
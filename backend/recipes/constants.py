@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 # Валидация полей на максимальное значение длины
 INGREDIENT_MAX_LENGTH = 128
 MEASUREMENT_UNIT_MAX_LENGTH = 64
@@ -6,7 +8,85 @@ RECIPE_MAX_LENGTH = 256
 SLUG_MAX_LENGTH = 32
 TAG_MAX_LENGTH = 32
 URL_TOKEN_MAX_LENGTH = 10
+JOB_KIND_MAX_LENGTH = 64
+JOB_KEY_MAX_LENGTH = 128
+JOB_STATUS_MAX_LENGTH = 16
 
 # Валидация полей на минимальное значение
 MIN_COOKING_TIME = 1
 MIN_INGREDIENT_AMOUNT = 1
+
+# Количество строк, загружаемых в базу данных за один запрос
+LOAD_DATA_BATCH_SIZE = 1000
+# Количество символов, читаемых из JSON-файла данных за один раз
+LOAD_DATA_READ_SIZE = 64 * 1024
+
+# Ключ кэша с версией справочников тегов и ингредиентов
+CATALOG_VERSION_CACHE_KEY = 'catalog_version'
+
+# Алфавит и смещение для токенов коротких ссылок. Смещение делает токены
+# не короче пяти символов, поэтому они не пересекаются со случайными
+# токенами из трех-четырех символов, выданными ранее.
+BASE62_ALPHABET = (
+    '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+)
+SHORT_LINK_TOKEN_OFFSET = 62 ** 4
+
+# Префикс ключей кэша для коротких ссылок
+SHORT_LINK_CACHE_PREFIX = 'short_link'
+
+# Уменьшенные копии изображений: поле модели и максимальный размер
+RECIPE_IMAGE_VARIANTS = {
+    'image_thumbnail': (160, 160),
+    'image_card': (640, 480),
+}
+IMAGE_VARIANT_FORMAT = 'WEBP'
+IMAGE_VARIANT_EXTENSION = 'webp'
+IMAGE_VARIANT_QUALITY = 80
+
+# Время хранения загруженных изображений, не привязанных к рецепту (в часах)
+IMAGE_UPLOAD_MAX_AGE_HOURS = 24
+
+# Фоновые задачи: пауза между проверками очереди (в секундах) и время,
+# после которого задача зависшего обработчика снова берется в работу
+JOB_POLL_INTERVAL = 1
+JOB_STALE_TIMEOUT = 10 * 60
+JOB_MAX_AGE_HOURS = 24
+
+# Конфигурация полнотекстового поиска PostgreSQL и вид фоновой задачи
+# обновления поисковых векторов рецептов после изменения ингредиента
+SEARCH_CONFIG = 'russian'
+SEARCH_VECTOR_JOB = 'recipe_search_vector'
+
+# Лента подписок: виды фоновых задач рассылки рецепта подписчикам
+# и рассылки последних рецептов автора, у которого стало меньше
+# FEED_FANOUT_MAX_FOLLOWERS подписчиков, количество записей, создаваемых
+# за один запрос, и количество последних рецептов автора, добавляемых
+# в ленту при подписке
+FEED_FANOUT_JOB = 'feed_fanout'
+FEED_AUTHOR_BACKFILL_JOB = 'feed_author_backfill'
+FEED_FANOUT_BATCH_SIZE = 1000
+FEED_BACKFILL_LIMIT = 20
+
+# Популярность за последнее время: начало отсчета времени событий,
+# ограничение показателя экспоненты, при котором меньшее слагаемое
+# пренебрежимо мало, количество рецептов, обновляемых за один запрос,
+# наименьшая разность популярности и вклада удаляемого события,
+# при которой вклад вычитается (при меньшей разности результат
+# вычитания неточен), и вид фоновой задачи пересчета популярности
+TRENDING_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+TRENDING_EXP_LIMIT = 50
+TRENDING_BATCH_SIZE = 1000
+TRENDING_MIN_REMOVAL_GAP = 1e-3
+TRENDING_JOB = 'recipe_trending_score'
+
+# Похожие рецепты: количество хранимых для рецепта похожих рецептов,
+# вид фоновой задачи их обновления, количество рецептов, загружаемых
+# и сохраняемых за один запрос, количество рецептов, для которых
+# сходство вычисляется за один шаг, и количество рецептов, при
+# превышении которого ингредиент считается распространенным
+SIMILAR_RECIPES_LIMIT = 10
+SIMILAR_RECIPES_JOB = 'similar_recipes'
+SIMILAR_RECIPES_BATCH_SIZE = 1000
+SIMILAR_RECIPES_BLOCK_SIZE = 200
+SIMILAR_RECIPES_MAX_INGREDIENT_RECIPES = 1000
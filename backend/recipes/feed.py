@@ -0,0 +1,158 @@
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from users.models import Subscription
+from .constants import (
+    FEED_AUTHOR_BACKFILL_JOB, FEED_BACKFILL_LIMIT, FEED_FANOUT_BATCH_SIZE,
+    FEED_FANOUT_JOB
+)
+from .jobs import enqueue_job, job_handler
+from .models import FeedItem, Recipe
+
+User = get_user_model()
+
+
+def schedule_feed_fanout(recipe):
+    """Функция ставит в очередь рассылку рецепта по лентам подписчиков."""
+
+    enqueue_job(
+        FEED_FANOUT_JOB, f'recipe:{recipe.pk}', {'recipe': recipe.pk}
+    )
+
+
+def schedule_author_backfill(author_id):
+    """
+    Функция ставит в очередь рассылку последних рецептов автора
+    по лентам подписчиков. Вызывается, когда у автора становится
+    не больше FEED_FANOUT_MAX_FOLLOWERS подписчиков: его рецепты,
+    опубликованные раньше, не рассылались и добавлялись в ленту
+    при чтении.
+    """
+
+    enqueue_job(
+        FEED_AUTHOR_BACKFILL_JOB, f'author:{author_id}',
+        {'author': author_id}
+    )
+
+
+def get_followers(author_id):
+    """Генератор идентификаторов подписчиков автора пачками."""
+
+    followers = Subscription.objects.filter(
+        author=author_id
+    ).values_list('user', flat=True).iterator(
+        chunk_size=FEED_FANOUT_BATCH_SIZE
+    )
+    while batch := list(islice(followers, FEED_FANOUT_BATCH_SIZE)):
+        yield batch
+
+
+def create_feed_items(user_ids, recipes):
+    """Функция добавляет рецепты recipes в ленты пользователей user_ids."""
+
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(
+                user_id=user_id, recipe_id=recipe.pk,
+                author_id=recipe.author_id, recipe_created=recipe.created
+            )
+            for user_id in user_ids for recipe in recipes
+        ],
+        batch_size=FEED_FANOUT_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def get_latest_recipes(author_id):
+    """Функция возвращает последние FEED_BACKFILL_LIMIT рецептов автора."""
+
+    return list(
+        Recipe.objects.filter(author=author_id).only(
+            'id', 'author', 'created'
+        ).order_by('-created', '-id')[:FEED_BACKFILL_LIMIT]
+    )
+
+
+@job_handler(FEED_FANOUT_JOB)
+def fanout_recipe(job):
+    """
+    Добавляет рецепт в ленты подписчиков автора пачками. Рецепты авторов
+    с числом подписчиков больше FEED_FANOUT_MAX_FOLLOWERS не рассылаются:
+    они добавляются в ленту при чтении.
+    """
+
+    recipe = Recipe.objects.select_related('author').only(
+        'id', 'created', 'author__followers_count'
+    ).filter(pk=job.payload['recipe']).first()
+    if (
+        recipe is None
+        or recipe.author.followers_count > settings.FEED_FANOUT_MAX_FOLLOWERS
+    ):
+        return
+
+    for batch in get_followers(recipe.author_id):
+        create_feed_items(batch, (recipe,))
+
+
+@job_handler(FEED_AUTHOR_BACKFILL_JOB)
+def backfill_author(job):
+    recipes = get_latest_recipes(job.payload['author'])
+    for batch in get_followers(job.payload['author']):
+        create_feed_items(batch, recipes)
+
+
+def backfill_feed(user_id, author_id):
+    """Функция добавляет в ленту последние рецепты нового автора."""
+
+    create_feed_items((user_id,), get_latest_recipes(author_id))
+
+
+def clear_feed(user_id, author_id):
+    """Функция удаляет из ленты рецепты автора, от которого отписались."""
+
+    FeedItem.objects.filter(user=user_id, author=author_id).delete()
+
+
+def get_seek_filter(created_field, id_field, created, recipe_id):
+    """Условие выбора записей ленты, опубликованных раньше курсора."""
+
+    return Q(**{f'{created_field}__lte': created}) & (
+        Q(**{f'{created_field}__lt': created})
+        | Q(**{created_field: created, f'{id_field}__lt': recipe_id})
+    )
+
+
+def get_feed_entries(user, limit, cursor=None):
+    """
+    Функция возвращает до limit пар (дата публикации, идентификатор
+    рецепта) ленты пользователя от новых к старым, опубликованных раньше
+    курсора cursor — такой же пары. Записи ленты выбираются по индексу
+    (user, -recipe_created, -recipe), рецепты авторов с большим числом
+    подписчиков — по индексу (author, -created) и объединяются.
+    """
+
+    items = FeedItem.objects.filter(user=user)
+    recipes = Recipe.objects.filter(author__in=User.objects.filter(
+        followers__user=user,
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).values('pk'))
+    if cursor is not None:
+        items = items.filter(
+            get_seek_filter('recipe_created', 'recipe', *cursor)
+        )
+        recipes = recipes.filter(get_seek_filter('created', 'id', *cursor))
+
+    # Рецепт автора, у которого стало много подписчиков, может быть
+    # и в записях ленты, поэтому пары объединяются во множество.
+    entries = {
+        *items.order_by('-recipe_created', '-recipe').values_list(
+            'recipe_created', 'recipe'
+        )[:limit],
+        *recipes.order_by('-created', '-id').values_list(
+            'created', 'id'
+        )[:limit],
+    }
+    return sorted(entries, reverse=True)[:limit]
@@ -0,0 +1,109 @@
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .constants import (
+    IMAGE_VARIANT_EXTENSION, IMAGE_VARIANT_FORMAT, IMAGE_VARIANT_QUALITY
+)
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PROCESSING_WORKERS,
+    thread_name_prefix='image-variants'
+)
+
+
+def render_variant(image, size):
+    """Функция уменьшает изображение до size и кодирует его в WebP."""
+
+    variant = image.copy()
+    variant.thumbnail(size, Image.Resampling.LANCZOS)
+    with io.BytesIO() as buffer:
+        variant.save(
+            buffer, IMAGE_VARIANT_FORMAT, quality=IMAGE_VARIANT_QUALITY
+        )
+        return buffer.getvalue()
+
+
+def generate_image_variants(model, pk, field_name, variants):
+    """
+    Функция создает уменьшенные копии изображения field_name объекта
+    и сохраняет их в поля, перечисленные в variants. Копии сохраняются,
+    только если изображение и копии не изменились, пока создавались
+    новые: иначе результат более поздней задачи не перезаписывается
+    устаревшими копиями, а созданные файлы удаляются. Старые копии
+    удаляются из хранилища после сохранения новых.
+    """
+
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+
+    original = getattr(instance, field_name)
+    current = {
+        field_name: original.name,
+        **{
+            variant_name: getattr(instance, variant_name).name
+            for variant_name in variants
+        }
+    }
+    updated_fields = dict.fromkeys(variants)
+
+    if original:
+        stem = Path(original.name).stem
+        try:
+            file = original.open('rb')
+        except FileNotFoundError:
+            # Изображение уже заменено или удалено, копии создаст
+            # задача, поставленная при его изменении.
+            return
+        with file, Image.open(file) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            for variant_name, size in variants.items():
+                variant = getattr(instance, variant_name)
+                variant.save(
+                    f'{stem}_{variant_name}.{IMAGE_VARIANT_EXTENSION}',
+                    ContentFile(render_variant(image, size)),
+                    save=False
+                )
+                updated_fields[variant_name] = variant.name
+
+    if model.objects.filter(pk=pk, **current).update(**updated_fields):
+        stale = [current[variant_name] for variant_name in variants]
+    else:
+        stale = updated_fields.values()
+    for name in stale:
+        if name:
+            original.storage.delete(name)
+
+
+def _run(model, pk, field_name, variants):
+    try:
+        generate_image_variants(model, pk, field_name, variants)
+    except Exception:
+        logger.exception(
+            'Не удалось создать копии изображения %s.%s (pk=%s)',
+            model.__name__, field_name, pk
+        )
+    finally:
+        close_old_connections()
+
+
+def schedule_image_variants(instance, field_name, variants):
+    """
+    Функция ставит создание уменьшенных копий изображения в очередь
+    пула потоков после фиксации текущей транзакции.
+    """
+
+    transaction.on_commit(lambda: executor.submit(
+        _run, type(instance), instance.pk, field_name, variants
+    ))
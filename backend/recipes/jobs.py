@@ -0,0 +1,94 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .constants import JOB_STALE_TIMEOUT
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+
+def job_handler(kind):
+    """
+    Декоратор регистрирует функцию-обработчик задач вида kind.
+    Обработчик получает задачу и может сохранить файл в job.result.
+    """
+
+    def decorator(func):
+        handlers[kind] = func
+        return func
+
+    return decorator
+
+
+def enqueue_job(kind, key, payload=None, reuse_result=False, user=None):
+    """
+    Функция ставит задачу в очередь и возвращает ее. Если задача
+    того же вида с тем же ключом еще ждет в очереди, новая не создается.
+    С reuse_result=True возвращается и выполняемая или уже выполненная
+    задача — для задач, результат которых зависит только от ключа.
+    user — пользователь, по запросу которого ставится задача; ключ такой
+    задачи должен содержать его идентификатор.
+    """
+
+    statuses = [Job.Status.PENDING]
+    if reuse_result:
+        statuses += [Job.Status.RUNNING, Job.Status.DONE]
+    jobs = Job.objects.filter(kind=kind, key=key).order_by('-created')
+
+    job = jobs.filter(status__in=statuses).first()
+    if job is not None:
+        return job
+
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                kind=kind, key=key, payload=payload or {}, user=user
+            )
+    except IntegrityError:
+        # Такую же задачу одновременно поставил другой запрос.
+        return jobs.first()
+
+
+def claim_job():
+    """
+    Функция выбирает задачу из очереди и помечает ее выполняемой.
+    Строки, заблокированные другими обработчиками, пропускаются, поэтому
+    несколько обработчиков не возьмут одну задачу. Задачи, выполнение
+    которых не завершилось за JOB_STALE_TIMEOUT, берутся повторно.
+    """
+
+    stale = timezone.now() - timedelta(seconds=JOB_STALE_TIMEOUT)
+    with transaction.atomic():
+        job = Job.objects.select_for_update(skip_locked=True).filter(
+            Q(status=Job.Status.PENDING)
+            | Q(status=Job.Status.RUNNING, started__lt=stale)
+        ).order_by('created').first()
+        if job is None:
+            return None
+        job.status = Job.Status.RUNNING
+        job.started = timezone.now()
+        job.save(update_fields=('status', 'started'))
+    return job
+
+
+def run_job(job):
+    """Функция выполняет задачу и сохраняет ее результат или ошибку."""
+
+    try:
+        handler = handlers[job.kind]
+        handler(job)
+    except Exception:
+        logger.exception('Ошибка выполнения задачи %s', job)
+        job.status = Job.Status.FAILED
+        job.error = traceback.format_exc()
+    else:
+        job.status = Job.Status.DONE
+    job.finished = timezone.now()
+    job.save(update_fields=('status', 'error', 'result', 'finished'))
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.constants import IMAGE_UPLOAD_MAX_AGE_HOURS
+from recipes.models import ImageUpload
+
+
+class Command(BaseCommand):
+    help = 'Удаление загруженных изображений, не привязанных к рецептам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=IMAGE_UPLOAD_MAX_AGE_HOURS,
+            help='Удалять загрузки старше указанного количества часов'
+        )
+
+    def handle(self, *args, **kwargs):
+        uploads = ImageUpload.objects.filter(
+            created__lt=timezone.now() - timedelta(hours=kwargs['hours'])
+        )
+
+        deleted = 0
+        for upload in uploads.iterator():
+            upload.image.delete(save=False)
+            upload.delete()
+            deleted += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено загрузок: {deleted}')
+        )
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.constants import JOB_MAX_AGE_HOURS
+from recipes.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Удаление завершенных фоновых задач и файлов их результатов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=JOB_MAX_AGE_HOURS,
+            help=(
+                'Удалять задачи, завершенные раньше указанного '
+                'количества часов назад'
+            )
+        )
+
+    def handle(self, *args, **kwargs):
+        jobs = Job.objects.filter(
+            status__in=(Job.Status.DONE, Job.Status.FAILED),
+            finished__lt=timezone.now() - timedelta(hours=kwargs['hours'])
+        )
+
+        deleted = 0
+        for job in jobs.iterator():
+            if job.result:
+                job.result.delete(save=False)
+            job.delete()
+            deleted += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено задач: {deleted}')
+        )
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from recipes.constants import RECIPE_IMAGE_VARIANTS
+from recipes.images import generate_image_variants
+from recipes.models import Recipe
+from users.constants import AVATAR_VARIANTS
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Создание уменьшенных копий изображений рецептов и аватаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Обрабатывать только объекты без уменьшенных копий'
+        )
+
+    def handle(self, *args, **kwargs):
+        self.generate(
+            Recipe, 'image', RECIPE_IMAGE_VARIANTS, kwargs['missing']
+        )
+        self.generate(User, 'avatar', AVATAR_VARIANTS, kwargs['missing'])
+        self.stdout.write(self.style.SUCCESS('Копии изображений созданы'))
+
+    def generate(self, model, field_name, variants, missing):
+        queryset = model.objects.exclude(
+            **{f'{field_name}__isnull': True}
+        ).exclude(**{field_name: ''})
+        if missing:
+            queryset = queryset.filter(
+                **{f'{variant}__isnull': True for variant in variants}
+            )
+
+        self.stdout.write(f'Обработка {model._meta.verbose_name_plural}...')
+        for pk in queryset.values_list('pk', flat=True).iterator():
+            try:
+                generate_image_variants(model, pk, field_name, variants)
+            except (OSError, ValueError) as error:
+                self.stdout.write(
+                    self.style.WARNING(f'  pk={pk}: {error}')
+                )
@@ -1,63 +1,166 @@
 import csv
+import json
+import re
+import time
+from itertools import islice
 from pathlib import Path
 
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
+from recipes.catalog import bump_catalog_version
+from recipes.constants import LOAD_DATA_BATCH_SIZE, LOAD_DATA_READ_SIZE
 from recipes.models import Ingredient, Tag
 
 User = get_user_model()
 
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def read_json_array(file):
+    """
+    Генератор элементов JSON-массива объектов из файла. Файл читается
+    частями по LOAD_DATA_READ_SIZE символов, в памяти находится только
+    непрочитанный остаток части и текущий элемент.
+    """
+
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    # Ожидается начало массива, первый элемент или конец массива,
+    # элемент после запятой либо запятая или конец массива.
+    expected = 'start'
+
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        item = None
+        if position < len(buffer):
+            char = buffer[position]
+            if expected == 'start':
+                if char != '[':
+                    raise ValueError('Ожидается JSON-массив')
+                position += 1
+                expected = 'first'
+                continue
+            if char == ']' and expected in ('first', 'next'):
+                return
+            if expected == 'next':
+                if char != ',':
+                    raise ValueError('Ожидается запятая в JSON-массиве')
+                position += 1
+                expected = 'item'
+                continue
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Элемент не поместился в прочитанную часть файла.
+                pass
+
+        if item is not None:
+            expected = 'next'
+            yield item
+        elif eof:
+            raise ValueError('Некорректный JSON-массив')
+        else:
+            chunk = file.read(LOAD_DATA_READ_SIZE)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
 
 class Command(BaseCommand):
-    help = 'Загрузка данных из CSV файлов в базу данных'
+    help = 'Загрузка данных из CSV или JSON файлов в базу данных'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--path',
             type=str,
-            help='Путь к директории с CSV файлами'
+            help='Путь к директории с файлами данных'
+        )
+        parser.add_argument(
+            '--format',
+            choices=('csv', 'json'),
+            default='csv',
+            help='Формат файлов данных'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=LOAD_DATA_BATCH_SIZE,
+            help='Количество строк, записываемых в базу за один запрос'
         )
 
     def handle(self, *args, **kwargs):
         path = kwargs['path'] or 'data/'
+        self.format = kwargs['format']
+        self.batch_size = kwargs['batch_size']
         self.stdout.write(f'Загрузка данных из директории: {path}')
 
         try:
             with transaction.atomic():
                 self.load_ingredients(path)
                 self.load_tags(path)
+            bump_catalog_version()
             self.stdout.write(self.style.SUCCESS('Данные успешно загружены'))
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Ошибка при загрузке данных: {str(e)}')
             )
 
-    def load_ingredients(self, path):
-        self.stdout.write('Загрузка ингредиентов...')
+    def read_rows(self, file):
+        """Генератор строк файла в виде словарей."""
+
+        if self.format == 'csv':
+            yield from csv.DictReader(file)
+        else:
+            yield from read_json_array(file)
+
+    def load(self, path, name, model, unique_field, update_fields):
+        """
+        Загружает файл пачками по batch_size строк. Каждая пачка
+        записывается одним запросом INSERT ... ON CONFLICT DO UPDATE,
+        поэтому существующие записи обновляются, а новые создаются.
+        """
+
+        fields = (unique_field, *update_fields)
+        loaded = 0
+        started = time.monotonic()
+
         with open(
-            Path(path) / 'ingredients.csv', 'r', encoding='utf-8'
+            Path(path) / f'{name}.{self.format}', 'r', encoding='utf-8'
         ) as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                Ingredient.objects.update_or_create(
-                    name=row['name'],
-                    defaults={
-                        'measurement_unit': row['measurement_unit']
-                    }
+            rows = self.read_rows(file)
+            while batch := list(islice(rows, self.batch_size)):
+                # В одной пачке запись с одним ключом должна встречаться
+                # один раз, иначе ON CONFLICT завершится ошибкой.
+                objects = {
+                    row[unique_field]: model(
+                        **{field: row[field] for field in fields}
+                    )
+                    for row in batch
+                }
+                model.objects.bulk_create(
+                    objects.values(),
+                    update_conflicts=True,
+                    unique_fields=(unique_field,),
+                    update_fields=update_fields
                 )
 
+                loaded += len(batch)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'  {loaded} строк, '
+                    f'{loaded / elapsed if elapsed else loaded:.0f} строк/с'
+                )
+
+    def load_ingredients(self, path):
+        self.stdout.write('Загрузка ингредиентов...')
+        self.load(
+            path, 'ingredients', Ingredient, 'name', ('measurement_unit',)
+        )
+
     def load_tags(self, path):
         self.stdout.write('Загрузка тегов...')
-        with open(
-            Path(path) / 'tags.csv', 'r', encoding='utf-8'
-        ) as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                Tag.objects.update_or_create(
-                    name=row['name'],
-                    defaults={
-                        'slug': row['slug']
-                    }
-                )
+        self.load(path, 'tags', Tag, 'name', ('slug',))
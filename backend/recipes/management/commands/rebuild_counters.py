@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.shopping_cart import refresh_shopping_cart_ingredients
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def count_subquery(queryset, field):
+    """Подзапрос, возвращающий количество строк queryset для OuterRef."""
+
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчет счетчиков рецептов и пользователей '
+        'и ингредиентов списков покупок'
+    )
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            self.stdout.write('Пересчет счетчиков рецептов...')
+            Recipe.objects.update(
+                favorites_count=count_subquery(
+                    Favorite.objects.all(), 'recipe'
+                ),
+                shopping_carts_count=count_subquery(
+                    ShoppingCart.objects.all(), 'recipe'
+                )
+            )
+
+            self.stdout.write('Пересчет счетчиков пользователей...')
+            User.objects.update(
+                recipes_count=count_subquery(Recipe.objects.all(), 'author'),
+                followers_count=count_subquery(
+                    Subscription.objects.all(), 'author'
+                )
+            )
+
+            self.stdout.write('Пересчет списков покупок...')
+            refresh_shopping_cart_ingredients(User.objects.values('pk'))
+
+        self.stdout.write(self.style.SUCCESS('Счетчики успешно пересчитаны'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import rebuild_similar_recipes
+
+
+class Command(BaseCommand):
+    help = 'Пересчет похожих рецептов по ингредиентам и тегам'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Пересчет похожих рецептов...')
+        rebuild_similar_recipes()
+        self.stdout.write(
+            self.style.SUCCESS('Похожие рецепты успешно пересчитаны')
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from recipes.trending import rebuild_trending_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчет популярности рецептов за последнее время '
+        'по датам добавления в избранное и список покупок'
+    )
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Пересчет популярности рецептов...')
+        rebuild_trending_scores()
+        self.stdout.write(
+            self.style.SUCCESS('Популярность рецептов успешно пересчитана')
+        )
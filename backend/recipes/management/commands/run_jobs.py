@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipes.constants import JOB_POLL_INTERVAL
+from recipes.jobs import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Выполнение фоновых задач из очереди в базе данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить задачи, находящиеся в очереди, и завершиться'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=JOB_POLL_INTERVAL,
+            help='Пауза между проверками пустой очереди (в секундах)'
+        )
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Обработчик фоновых задач запущен')
+        while True:
+            close_old_connections()
+            job = claim_job()
+            if job is None:
+                if kwargs['once']:
+                    break
+                time.sleep(kwargs['interval'])
+                continue
+
+            run_job(job)
+            self.stdout.write(f'  {job}')
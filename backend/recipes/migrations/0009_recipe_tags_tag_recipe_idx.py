@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 10:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Составной индекс (tag_id, recipe_id) для автоматически созданной
+    промежуточной таблицы тегов рецептов. Позволяет выполнять фильтр
+    по тегам как полусоединение только по индексу.
+    """
+
+    dependencies = [
+        ('recipes', '0008_recipe_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX recipe_tags_tag_recipe_idx '
+                'ON recipes_recipe_tags (tag_id, recipe_id);'
+            ),
+            reverse_sql='DROP INDEX recipe_tags_tag_recipe_idx;',
+        ),
+    ]
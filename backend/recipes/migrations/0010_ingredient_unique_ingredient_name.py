@@ -0,0 +1,58 @@
+# Generated by Django 6.0 on 2026-10-18 03:01
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """
+    Ингредиенты с одинаковым названием объединяются в ингредиент
+    с наименьшим id: строки рецептов переносятся на него, а если в рецепте
+    уже есть этот ингредиент, количества складываются.
+    """
+
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+
+    duplicates = Ingredient.objects.values('name').annotate(
+        count=Count('pk'), survivor=Min('pk')
+    ).filter(count__gt=1).order_by()
+    for duplicate in duplicates:
+        survivor = duplicate['survivor']
+        others = Ingredient.objects.filter(
+            name=duplicate['name']
+        ).exclude(pk=survivor)
+        for recipe_ingredient in RecipeIngredient.objects.filter(
+            ingredient__in=others
+        ).order_by('pk'):
+            existing = RecipeIngredient.objects.filter(
+                recipe=recipe_ingredient.recipe_id, ingredient=survivor
+            ).first()
+            if existing is None:
+                recipe_ingredient.ingredient_id = survivor
+                recipe_ingredient.save(update_fields=('ingredient',))
+            else:
+                existing.amount += recipe_ingredient.amount
+                existing.save(update_fields=('amount',))
+                recipe_ingredient.delete()
+        others.delete()
+
+
+class Migration(migrations.Migration):
+    # Ограничение добавляется после фиксации объединения: PostgreSQL
+    # не изменяет таблицу с отложенными проверками внешних ключей.
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0009_recipe_tags_tag_recipe_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_ingredient_name'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Sum
+
+
+def populate_shopping_cart_ingredients(apps, schema_editor):
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingCartIngredient = apps.get_model(
+        'recipes', 'ShoppingCartIngredient'
+    )
+
+    totals = RecipeIngredient.objects.filter(
+        recipe__shoppingcart_set__isnull=False
+    ).values(
+        'recipe__shoppingcart_set__user', 'ingredient'
+    ).annotate(total=Sum('amount')).order_by()
+
+    ShoppingCartIngredient.objects.bulk_create(
+        ShoppingCartIngredient(
+            user_id=row['recipe__shoppingcart_set__user'],
+            ingredient_id=row['ingredient'],
+            total_amount=row['total']
+        )
+        for row in totals.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_shoppingcartingredient'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            populate_shopping_cart_ingredients, migrations.RunPython.noop
+        ),
+    ]
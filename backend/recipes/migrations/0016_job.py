@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 03:16
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_populate_shopping_cart_ingredients'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=64, verbose_name='Вид задачи')),
+                ('key', models.CharField(max_length=128, verbose_name='Ключ задачи')),
+                ('payload', models.JSONField(default=dict, verbose_name='Параметры')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Выполнена'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус')),
+                ('result', models.FileField(blank=True, null=True, upload_to='jobs/', verbose_name='Результат')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('started', models.DateTimeField(blank=True, null=True, verbose_name='Дата начала выполнения')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+            ],
+            options={
+                'verbose_name': 'фоновая задача',
+                'verbose_name_plural': 'Фоновые задачи',
+                'ordering': ('created',),
+                'indexes': [models.Index(fields=['status', 'created'], name='job_status_created_idx'), models.Index(fields=['kind', 'key'], name='job_kind_key_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ('pending', 'running'))), fields=('kind', 'key'), name='unique_active_job')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Func, OuterRef, TextField, Value
+
+SEARCH_CONFIG = 'russian'
+
+
+def populate_search_vectors(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+
+    ingredient_names = Func(
+        ArraySubquery(
+            Ingredient.objects.filter(
+                ingredient_recipes__recipe=OuterRef('pk')
+            ).values('name')
+        ),
+        Value(' '),
+        function='array_to_string',
+        output_field=TextField()
+    )
+    Recipe.objects.update(search_vector=(
+        SearchVector('name', config=SEARCH_CONFIG, weight='A')
+        + SearchVector(ingredient_names, config=SEARCH_CONFIG, weight='B')
+        + SearchVector('text', config=SEARCH_CONFIG, weight='C')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0018_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            populate_search_vectors, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import migrations
+from django.db.models import OuterRef
+
+
+def populate_ingredient_ids(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+
+    Recipe.objects.update(ingredient_ids=ArraySubquery(
+        RecipeIngredient.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by('ingredient').values('ingredient')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0020_recipe_ingredient_ids'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            populate_ingredient_ids, migrations.RunPython.noop
+        ),
+    ]
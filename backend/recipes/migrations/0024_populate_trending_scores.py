@@ -0,0 +1,41 @@
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import F, Value
+from django.db.models.functions import Ln
+
+TRENDING_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def populate_trending_scores(apps, schema_editor):
+    """
+    Дата добавления существующих записей избранного и списков покупок
+    неизвестна и считается равной текущей, поэтому популярность рецепта
+    определяется количеством таких записей.
+    """
+
+    Recipe = apps.get_model('recipes', 'Recipe')
+
+    score = (
+        (datetime.now(timezone.utc) - TRENDING_EPOCH).total_seconds()
+        * math.log(2) / settings.TRENDING_HALF_LIFE
+    )
+    total = F('favorites_count') + F('shopping_carts_count')
+    Recipe.objects.annotate(total=total).filter(total__gt=0).update(
+        trending_score=Value(score) + Ln(total)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0023_trending_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            populate_trending_scores, migrations.RunPython.noop
+        ),
+    ]
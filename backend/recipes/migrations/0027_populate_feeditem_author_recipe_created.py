@@ -0,0 +1,26 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def populate_author_recipe_created(apps, schema_editor):
+    FeedItem = apps.get_model('recipes', 'FeedItem')
+    Recipe = apps.get_model('recipes', 'Recipe')
+
+    recipes = Recipe.objects.filter(pk=OuterRef('recipe'))
+    FeedItem.objects.update(
+        author=Subquery(recipes.values('author')),
+        recipe_created=Subquery(recipes.values('created'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0026_feeditem_author_recipe_created'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            populate_author_recipe_created, migrations.RunPython.noop
+        ),
+    ]
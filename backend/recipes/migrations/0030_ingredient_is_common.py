@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0029_job_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='is_common',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Распространенный'),
+        ),
+    ]
@@ -1,14 +1,22 @@
+import uuid
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.utils.crypto import get_random_string
+from django.db.models.functions import Upper
 
 from .constants import (
-    INGREDIENT_MAX_LENGTH, MEASUREMENT_UNIT_MAX_LENGTH, MIN_COOKING_TIME,
+    INGREDIENT_MAX_LENGTH, JOB_KEY_MAX_LENGTH, JOB_KIND_MAX_LENGTH,
+    JOB_STATUS_MAX_LENGTH, MEASUREMENT_UNIT_MAX_LENGTH, MIN_COOKING_TIME,
     MIN_INGREDIENT_AMOUNT, OBJECT_TITLE_LIMIT, RECIPE_MAX_LENGTH,
-    SLUG_MAX_LENGTH, TAG_MAX_LENGTH, URL_TOKEN_MAX_LENGTH
+    SHORT_LINK_TOKEN_OFFSET, SLUG_MAX_LENGTH, TAG_MAX_LENGTH,
+    URL_TOKEN_MAX_LENGTH
 )
+from .utils import encode_base62
 
 User = get_user_model()
 
@@ -29,6 +37,9 @@ class UserRecipeRelationModel(models.Model):
         verbose_name='Рецепт',
         related_name='%(class)s_set'
     )
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата добавления'
+    )
 
     class Meta:
         abstract = True
@@ -69,11 +80,29 @@ class Ingredient(models.Model):
         max_length=MEASUREMENT_UNIT_MAX_LENGTH,
         verbose_name='Единица измерения'
     )
+    # Распространенные ингредиенты не используются при отборе кандидатов
+    # в похожие рецепты, значение обновляет rebuild_similar_recipes.
+    is_common = models.BooleanField(
+        default=False, editable=False, verbose_name='Распространенный'
+    )
 
     class Meta:
         verbose_name = 'ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('name',),
+                name='unique_ingredient_name'
+            ),
+        )
+        indexes = (
+            # Индекс для поиска по началу названия (istartswith).
+            models.Index(
+                OpClass(Upper('name'), name='text_pattern_ops'),
+                name='ingredient_name_upper_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name[:OBJECT_TITLE_LIMIT]
@@ -95,6 +124,14 @@ class Recipe(models.Model):
         upload_to='recipes/images/', null=True, default=None,
         verbose_name='Картинка'
     )
+    image_thumbnail = models.ImageField(
+        upload_to='recipes/images/variants/', blank=True, null=True,
+        editable=False, verbose_name='Миниатюра картинки'
+    )
+    image_card = models.ImageField(
+        upload_to='recipes/images/variants/', blank=True, null=True,
+        editable=False, verbose_name='Картинка для карточки'
+    )
     ingredients = models.ManyToManyField(
         Ingredient, through='RecipeIngredient', verbose_name='Ингредиенты'
     )
@@ -106,33 +143,70 @@ class Recipe(models.Model):
     created = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата создания'
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Добавлений в избранное'
+    )
+    shopping_carts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Добавлений в список покупок'
+    )
+    search_vector = SearchVectorField(
+        null=True, editable=False, verbose_name='Поисковый вектор'
+    )
+    ingredient_ids = ArrayField(
+        models.BigIntegerField(), default=list, editable=False,
+        verbose_name='Идентификаторы ингредиентов'
+    )
+    trending_score = models.FloatField(
+        default=0, editable=False,
+        verbose_name='Популярность за последнее время'
+    )
 
     class Meta:
         verbose_name = 'рецепт'
         verbose_name_plural = 'Рецепты'
         default_related_name = 'recipes'
         ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=('-created', '-id'), name='recipe_created_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-created'), name='recipe_author_created_idx'
+            ),
+            GinIndex(
+                fields=('search_vector',), name='recipe_search_vector_idx'
+            ),
+            GinIndex(
+                fields=('ingredient_ids',), name='recipe_ingredient_ids_idx'
+            ),
+            models.Index(
+                fields=('-trending_score', '-id'), name='recipe_trending_idx'
+            ),
+            models.Index(
+                (
+                    models.F('favorites_count')
+                    + models.F('shopping_carts_count')
+                ).desc(),
+                models.F('id').desc(),
+                name='recipe_popular_idx'
+            ),
+        )
 
     def generate_short_link_token(self):
-        max_attempts = 100
-        attempts = 0
-
-        while attempts < max_attempts:
-            short_link_token = get_random_string(3)
-
-            if not Recipe.objects.filter(
-                short_link_token=short_link_token
-            ).exists():
-                return short_link_token
-
-            attempts += 1
+        """
+        Токен короткой ссылки — идентификатор рецепта в base62,
+        поэтому токены разных рецептов не совпадают.
+        """
 
-        return get_random_string(4)
+        return encode_base62(self.pk + SHORT_LINK_TOKEN_OFFSET)
 
     def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
         if not self.short_link_token:
             self.short_link_token = self.generate_short_link_token()
-        super().save(*args, **kwargs)
+            Recipe.objects.filter(pk=self.pk).update(
+                short_link_token=self.short_link_token
+            )
 
     @property
     def short_link(self):
@@ -184,3 +258,215 @@ class ShoppingCart(UserRecipeRelationModel):
     class Meta(UserRecipeRelationModel.Meta):
         verbose_name = 'cписок покупок'
         verbose_name_plural = 'Списки покупок'
+
+
+class ShoppingCartIngredient(models.Model):
+    """
+    Суммарное количество ингредиента по всем рецептам списка покупок
+    пользователя. Обновляется при изменении списка покупок и ингредиентов
+    входящих в него рецептов, поэтому список покупок читается без агрегации.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='shopping_cart_ingredients',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE,
+        related_name='shopping_cart_ingredients',
+        verbose_name='Ингредиент'
+    )
+    total_amount = models.PositiveIntegerField(verbose_name='Количество')
+
+    class Meta:
+        verbose_name = 'ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списках покупок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_cart_ingredient'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} - {self.ingredient}.'
+
+
+class FeedItem(models.Model):
+    """
+    Рецепт в ленте подписок пользователя. Записи создаются фоновой
+    задачей при публикации рецепта автором, на которого подписан
+    пользователь. Автор и дата публикации рецепта скопированы в запись,
+    чтобы лента выбиралась по индексу без обращения к рецептам.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Пользователь'
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор рецепта'
+    )
+    recipe_created = models.DateTimeField(
+        verbose_name='Дата публикации рецепта'
+    )
+
+    class Meta:
+        verbose_name = 'рецепт в ленте'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_item'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-recipe_created', '-recipe'),
+                name='feed_item_user_created_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}.'
+
+
+class SimilarRecipe(models.Model):
+    """
+    Похожий рецепт: один из ближайших по ингредиентам и тегам.
+    Заполняется фоновой задачей после сохранения рецепта
+    и командой rebuild_similar_recipes.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        verbose_name = 'похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        ordering = ('recipe', '-score')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'similar'),
+                name='unique_similar_recipe'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.similar} похож на {self.recipe}.'
+
+
+class ImageUpload(models.Model):
+    """
+    Изображение, загруженное отдельным запросом до создания рецепта.
+    Идентификатор загрузки передается в поле image_upload рецепта.
+    """
+
+    id = models.UUIDField(
+        primary_key=True, default=uuid.uuid4, editable=False
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='image_uploads',
+        verbose_name='Пользователь'
+    )
+    image = models.ImageField(
+        upload_to='recipes/uploads/', verbose_name='Картинка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата загрузки'
+    )
+
+    class Meta:
+        verbose_name = 'загруженное изображение'
+        verbose_name_plural = 'Загруженные изображения'
+        ordering = ('-created',)
+
+    def __str__(self):
+        return f'{self.user} - {self.image.name}.'
+
+
+class Job(models.Model):
+    """
+    Фоновая задача. Задачи хранятся в базе данных и выполняются
+    командой run_jobs. Ожидающая задача с одинаковыми видом и ключом
+    может быть только одна, поэтому повторные запросы ее не дублируют.
+    У задач, поставленных по запросу пользователя, заполнено поле user.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнена'
+        FAILED = 'failed', 'Ошибка'
+
+    id = models.UUIDField(
+        primary_key=True, default=uuid.uuid4, editable=False
+    )
+    kind = models.CharField(
+        max_length=JOB_KIND_MAX_LENGTH, verbose_name='Вид задачи'
+    )
+    key = models.CharField(
+        max_length=JOB_KEY_MAX_LENGTH, verbose_name='Ключ задачи'
+    )
+    payload = models.JSONField(default=dict, verbose_name='Параметры')
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, blank=True, null=True,
+        related_name='jobs', verbose_name='Пользователь'
+    )
+    status = models.CharField(
+        max_length=JOB_STATUS_MAX_LENGTH, choices=Status.choices,
+        default=Status.PENDING, verbose_name='Статус'
+    )
+    result = models.FileField(
+        upload_to='jobs/', blank=True, null=True, verbose_name='Результат'
+    )
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата создания'
+    )
+    started = models.DateTimeField(
+        blank=True, null=True, verbose_name='Дата начала выполнения'
+    )
+    finished = models.DateTimeField(
+        blank=True, null=True, verbose_name='Дата завершения'
+    )
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('created',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('kind', 'key'),
+                condition=models.Q(status='pending'),
+                name='unique_pending_job'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('status', 'created'), name='job_status_created_idx'
+            ),
+            models.Index(fields=('kind', 'key'), name='job_kind_key_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.kind}:{self.key} ({self.status})'
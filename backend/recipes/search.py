@@ -0,0 +1,106 @@
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchVector
+from django.db.models import (
+    Case, FloatField, Func, IntegerField, OuterRef, TextField, Value, When
+)
+from django.db.models.functions import Cast
+
+from .constants import SEARCH_CONFIG, SEARCH_VECTOR_JOB
+from .jobs import enqueue_job, job_handler
+from .models import Ingredient, Recipe, RecipeIngredient
+
+
+def get_search_vector():
+    """
+    Выражение поискового вектора рецепта: название (вес A),
+    названия ингредиентов (вес B) и описание (вес C).
+    """
+
+    ingredient_names = Func(
+        ArraySubquery(
+            Ingredient.objects.filter(
+                ingredient_recipes__recipe=OuterRef('pk')
+            ).values('name')
+        ),
+        Value(' '),
+        function='array_to_string',
+        output_field=TextField()
+    )
+    return (
+        SearchVector('name', config=SEARCH_CONFIG, weight='A')
+        + SearchVector(ingredient_names, config=SEARCH_CONFIG, weight='B')
+        + SearchVector('text', config=SEARCH_CONFIG, weight='C')
+    )
+
+
+def get_ingredient_ids():
+    """Выражение массива идентификаторов ингредиентов рецепта."""
+
+    return ArraySubquery(
+        RecipeIngredient.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by('ingredient').values('ingredient')
+    )
+
+
+def update_recipe_indexes(recipes):
+    """
+    Функция пересчитывает поисковые векторы и массивы ингредиентов
+    рецептов одним запросом. recipes — идентификаторы рецептов
+    или запрос, возвращающий их.
+    """
+
+    Recipe.objects.filter(pk__in=recipes).update(
+        search_vector=get_search_vector(),
+        ingredient_ids=get_ingredient_ids()
+    )
+
+
+def match_by_ingredients(queryset, ingredient_ids):
+    """
+    Функция выбирает рецепты, в которых есть хотя бы один из ингредиентов
+    ingredient_ids, и добавляет к ним количество имеющихся (matched)
+    и недостающих (missing) ингредиентов и долю имеющихся (coverage).
+    Отбор выполняется по GIN-индексу массива ingredient_ids рецепта.
+    """
+
+    matched = sum(
+        (
+            Case(
+                When(ingredient_ids__contains=[ingredient_id], then=1),
+                default=0
+            )
+            for ingredient_id in ingredient_ids
+        ),
+        Value(0)
+    )
+    total = Func(
+        'ingredient_ids', function='cardinality', output_field=IntegerField()
+    )
+    return queryset.filter(ingredient_ids__overlap=ingredient_ids).annotate(
+        matched=matched,
+        missing=total - matched,
+        coverage=Cast(matched, FloatField()) / total
+    )
+
+
+def schedule_ingredient_search_update(ingredient_id):
+    """
+    Функция ставит в очередь пересчет векторов рецептов с ингредиентом.
+    Таких рецептов может быть много, поэтому пересчет выполняется
+    обработчиком фоновых задач.
+    """
+
+    enqueue_job(
+        SEARCH_VECTOR_JOB, f'ingredient:{ingredient_id}',
+        {'ingredient': ingredient_id}
+    )
+
+
+@job_handler(SEARCH_VECTOR_JOB)
+def update_ingredient_search_vectors(job):
+    update_recipe_indexes(
+        Recipe.objects.filter(
+            recipe_ingredients__ingredient=job.payload['ingredient']
+        ).values('pk')
+    )
@@ -0,0 +1,108 @@
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from .models import RecipeIngredient, ShoppingCart, ShoppingCartIngredient
+
+
+def refresh_shopping_cart_ingredients(user_ids, ingredient_ids=None):
+    """
+    Функция пересчитывает суммарное количество ингредиентов в списках
+    покупок пользователей user_ids. Если переданы ingredient_ids,
+    пересчитываются только эти ингредиенты.
+    """
+
+    totals = RecipeIngredient.objects.filter(
+        recipe__shoppingcart_set__user__in=user_ids
+    )
+    stale = ShoppingCartIngredient.objects.filter(user__in=user_ids)
+    if ingredient_ids is not None:
+        totals = totals.filter(ingredient__in=ingredient_ids)
+        stale = stale.filter(ingredient__in=ingredient_ids)
+
+    totals = totals.values(
+        'recipe__shoppingcart_set__user', 'ingredient'
+    ).annotate(total=Sum('amount')).order_by()
+
+    with transaction.atomic():
+        stale.delete()
+        # Строки, добавленные параллельной транзакцией, обновляются.
+        ShoppingCartIngredient.objects.bulk_create(
+            [
+                ShoppingCartIngredient(
+                    user_id=row['recipe__shoppingcart_set__user'],
+                    ingredient_id=row['ingredient'],
+                    total_amount=row['total']
+                )
+                for row in totals
+            ],
+            update_conflicts=True,
+            unique_fields=('user', 'ingredient'),
+            update_fields=('total_amount',)
+        )
+
+
+def refresh_recipe_in_shopping_carts(recipe_id, ingredient_ids=None):
+    """
+    Функция пересчитывает ингредиенты ingredient_ids (по умолчанию все)
+    в списках покупок пользователей, добавивших рецепт recipe_id.
+    """
+
+    refresh_shopping_cart_ingredients(
+        ShoppingCart.objects.filter(recipe=recipe_id).values('user'),
+        ingredient_ids
+    )
+
+
+def apply_recipe_ingredient_deltas(recipe_id, deltas):
+    """
+    Функция изменяет суммарное количество ингредиентов в списках покупок
+    пользователей, добавивших рецепт recipe_id, на изменение количества
+    ингредиентов в рецепте: deltas — словарь {ингредиент: изменение}.
+    Пользователи не загружаются из базы, количество запросов
+    не зависит от числа добавивших рецепт.
+    """
+
+    deltas = {
+        ingredient_id: delta for ingredient_id, delta in deltas.items()
+        if delta
+    }
+    if not deltas:
+        return
+
+    holders = ShoppingCart.objects.filter(recipe=recipe_id).values('user')
+    added = {
+        ingredient_id: delta for ingredient_id, delta in deltas.items()
+        if delta > 0
+    }
+    reduced = deltas.keys() - added.keys()
+
+    with transaction.atomic():
+        ShoppingCartIngredient.objects.filter(
+            user__in=holders, ingredient__in=deltas
+        ).update(total_amount=F('total_amount') + Case(
+            *(
+                When(ingredient=ingredient_id, then=Value(delta))
+                for ingredient_id, delta in deltas.items()
+            ),
+            output_field=IntegerField()
+        ))
+        if added:
+            # Строк для новых ингредиентов рецепта в списках покупок
+            # может не быть, они создаются одним запросом INSERT ... SELECT.
+            # Существующие строки уже обновлены выше.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {ShoppingCartIngredient._meta.db_table} '
+                    '(user_id, ingredient_id, total_amount) '
+                    'SELECT cart.user_id, delta.ingredient_id, delta.amount '
+                    f'FROM {ShoppingCart._meta.db_table} AS cart '
+                    'CROSS JOIN unnest(%s::bigint[], %s::integer[]) '
+                    'AS delta(ingredient_id, amount) '
+                    'WHERE cart.recipe_id = %s '
+                    'ON CONFLICT (user_id, ingredient_id) DO NOTHING',
+                    [list(added), list(added.values()), recipe_id]
+                )
+        if reduced:
+            ShoppingCartIngredient.objects.filter(
+                user__in=holders, ingredient__in=reduced, total_amount=0
+            ).delete()
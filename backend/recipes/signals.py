@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_version
+from .feed import schedule_feed_fanout
+from .models import (
+    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag
+)
+from .search import schedule_ingredient_search_update
+from .shopping_cart import refresh_shopping_cart_ingredients
+from .trending import add_trending_event, remove_trending_event
+from .utils import get_short_link_cache_key
+
+User = get_user_model()
+
+
+def update_recipe_counter(recipe_id, field, delta):
+    """Атомарно изменяет счетчик рецепта на delta."""
+
+    Recipe.objects.filter(pk=recipe_id).update(**{field: F(field) + delta})
+
+
+def is_recipe_deletion(origin):
+    """
+    Проверяет, что строка удаляется каскадно вместе с рецептом:
+    счетчики и популярность удаляемого рецепта обновлять не нужно.
+    """
+
+    if isinstance(origin, QuerySet):
+        return origin.model is Recipe
+    return isinstance(origin, Recipe)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    if created:
+        update_recipe_counter(instance.recipe_id, 'favorites_count', 1)
+        add_trending_event(instance.recipe_id, instance.created)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, origin=None, **kwargs):
+    if is_recipe_deletion(origin):
+        return
+    update_recipe_counter(instance.recipe_id, 'favorites_count', -1)
+    remove_trending_event(instance.recipe_id, instance.created)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_created(sender, instance, created, **kwargs):
+    if created:
+        update_recipe_counter(instance.recipe_id, 'shopping_carts_count', 1)
+        add_trending_event(instance.recipe_id, instance.created)
+        refresh_shopping_cart_ingredients(
+            (instance.user_id,),
+            RecipeIngredient.objects.filter(
+                recipe=instance.recipe_id
+            ).values('ingredient')
+        )
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_deleted(sender, instance, origin=None, **kwargs):
+    # Списки покупок при удалении рецепта пересчитываются в recipe_deleted.
+    if is_recipe_deletion(origin):
+        return
+    update_recipe_counter(instance.recipe_id, 'shopping_carts_count', -1)
+    remove_trending_event(instance.recipe_id, instance.created)
+    # Ингредиенты рецепта могут быть уже удалены вместе с рецептом,
+    # поэтому список покупок пользователя пересчитывается целиком.
+    refresh_shopping_cart_ingredients((instance.user_id,))
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        User.objects.filter(pk=instance.author_id).update(
+            recipes_count=F('recipes_count') + 1
+        )
+        transaction.on_commit(lambda: schedule_feed_fanout(instance))
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    # Пользователи, добавившие рецепт в список покупок, и ингредиенты
+    # рецепта запоминаются до каскадного удаления, чтобы пересчитать
+    # их списки покупок одним запросом, а не для каждой строки.
+    instance.shopping_cart_users = list(
+        ShoppingCart.objects.filter(recipe=instance)
+        .values_list('user', flat=True)
+    )
+    instance.shopping_cart_ingredients = []
+    if instance.shopping_cart_users:
+        instance.shopping_cart_ingredients = list(
+            RecipeIngredient.objects.filter(recipe=instance)
+            .values_list('ingredient', flat=True)
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    User.objects.filter(pk=instance.author_id).update(
+        recipes_count=F('recipes_count') - 1
+    )
+    if instance.shopping_cart_users:
+        refresh_shopping_cart_ingredients(
+            instance.shopping_cart_users, instance.shopping_cart_ingredients
+        )
+    if instance.short_link_token:
+        cache.delete(get_short_link_cache_key(instance.short_link_token))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def catalog_changed(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(
+            lambda: schedule_ingredient_search_update(instance.pk)
+        )
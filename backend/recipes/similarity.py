@@ -0,0 +1,281 @@
+"""
+Похожие рецепты. Рецепт представлен разреженным вектором из нулей
+и единиц по ингредиентам и тегам, сходство рецептов — косинус угла
+между векторами. Для каждого рецепта хранятся SIMILAR_RECIPES_LIMIT
+самых похожих, при запросе сходство не вычисляется.
+
+Кандидаты в похожие рецепты — рецепты хотя бы с одним общим
+нераспространенным ингредиентом. Общие теги и распространенные
+ингредиенты (более чем в SIMILAR_RECIPES_MAX_INGREDIENT_RECIPES
+рецептах) есть почти у всех рецептов, поэтому сходство со всеми
+рецептами не вычисляется, а количество кандидатов не растет вместе
+с каталогом. Распространенные ингредиенты отмечаются при полном
+пересчете, фоновая задача использует эти отметки.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+from scipy import sparse
+
+from .constants import (
+    SIMILAR_RECIPES_BATCH_SIZE, SIMILAR_RECIPES_BLOCK_SIZE,
+    SIMILAR_RECIPES_JOB, SIMILAR_RECIPES_LIMIT,
+    SIMILAR_RECIPES_MAX_INGREDIENT_RECIPES
+)
+from .jobs import enqueue_job, job_handler
+from .models import Ingredient, Recipe, SimilarRecipe
+
+
+def load_features(recipes):
+    """
+    Функция возвращает идентификаторы рецептов recipes по возрастанию,
+    матрицу их признаков: строка — рецепт, столбец — ингредиент или тег,
+    и номера столбцов признаков.
+    """
+
+    recipe_ids = []
+    rows = []
+    columns = []
+    features = {}
+
+    for row, (recipe_id, ingredient_ids) in enumerate(
+        recipes.order_by('pk').values_list(
+            'pk', 'ingredient_ids'
+        ).iterator(chunk_size=SIMILAR_RECIPES_BATCH_SIZE)
+    ):
+        recipe_ids.append(recipe_id)
+        for ingredient_id in ingredient_ids:
+            rows.append(row)
+            columns.append(features.setdefault(
+                ('ingredient', ingredient_id), len(features)
+            ))
+
+    positions = {recipe_id: row for row, recipe_id in enumerate(recipe_ids)}
+    for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+        recipe__in=recipes.values('pk')
+    ).values_list('recipe', 'tag').iterator(
+        chunk_size=SIMILAR_RECIPES_BATCH_SIZE
+    ):
+        # Рецепт мог быть создан после выборки рецептов.
+        if recipe_id in positions:
+            rows.append(positions[recipe_id])
+            columns.append(features.setdefault(
+                ('tag', tag_id), len(features)
+            ))
+
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(len(recipe_ids), len(features))
+    )
+    return np.array(recipe_ids, dtype=np.int64), matrix, features
+
+
+def get_rows(recipe_ids, ids):
+    """Функция возвращает строки матрицы признаков для рецептов ids."""
+
+    ids = np.asarray(ids, dtype=np.int64)
+    rows = np.searchsorted(recipe_ids, ids)
+    found = rows < len(recipe_ids)
+    found[found] = recipe_ids[rows[found]] == ids[found]
+    return rows[found]
+
+
+def get_scores(matrix, rows, others):
+    """
+    Функция возвращает косинусное сходство рецептов в строках rows
+    и others: количество общих признаков, деленное на корень
+    из произведения количеств признаков.
+    """
+
+    shared = np.asarray(
+        matrix[rows].multiply(matrix[others]).sum(axis=1)
+    ).ravel()
+    sizes = np.diff(matrix.indptr).astype(np.float64)
+    return shared / np.sqrt(sizes[rows] * sizes[others])
+
+
+def mark_common_ingredients(matrix, features):
+    """
+    Функция отмечает ингредиенты, которые есть более чем
+    в SIMILAR_RECIPES_MAX_INGREDIENT_RECIPES рецептах, и возвращает
+    столбцы матрицы признаков с остальными ингредиентами.
+    """
+
+    counts = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    common = []
+    columns = []
+    for (kind, feature_id), column in features.items():
+        if kind != 'ingredient':
+            continue
+        if counts[column] > SIMILAR_RECIPES_MAX_INGREDIENT_RECIPES:
+            common.append(feature_id)
+        else:
+            columns.append(column)
+
+    with transaction.atomic():
+        Ingredient.objects.filter(is_common=True).exclude(
+            pk__in=common
+        ).update(is_common=False)
+        Ingredient.objects.filter(pk__in=common).update(is_common=True)
+    return columns
+
+
+def find_similar(recipe_ids, matrix, candidates, transposed, rows):
+    """
+    Функция возвращает похожие рецепты для рецептов в строках rows.
+    Пары рецептов с общим нераспространенным ингредиентом находятся умножением
+    матрицы нераспространенных ингредиентов candidates на транспонированную
+    матрицу transposed, сходство вычисляется только для этих пар,
+    из них для каждого рецепта выбираются наибольшие.
+    """
+
+    pairs = (candidates[rows] @ transposed).tocoo()
+    owners = rows[pairs.row]
+    others = pairs.col
+    mask = owners != others
+    owners, others = owners[mask], others[mask]
+    scores = get_scores(matrix, owners, others)
+    # При равном сходстве выбираются более новые рецепты,
+    # как и при выдаче похожих рецептов.
+    order = np.lexsort((-recipe_ids[others], -scores, owners))
+    owners, others, scores = owners[order], others[order], scores[order]
+    ranks = np.arange(len(owners)) - np.searchsorted(owners, owners)
+    top = ranks < SIMILAR_RECIPES_LIMIT
+    return [
+        SimilarRecipe(
+            recipe_id=int(recipe_ids[owner]),
+            similar_id=int(recipe_ids[other]),
+            score=float(score)
+        )
+        for owner, other, score in zip(owners[top], others[top], scores[top])
+    ]
+
+
+def replace_similar(recipe_ids, similar):
+    """Функция заменяет похожие рецепты для рецептов recipe_ids."""
+
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(recipe__in=recipe_ids).delete()
+        SimilarRecipe.objects.bulk_create(
+            similar, batch_size=SIMILAR_RECIPES_BATCH_SIZE
+        )
+
+
+def rebuild_similar_recipes():
+    """
+    Функция пересчитывает похожие рецепты для всех рецептов
+    по SIMILAR_RECIPES_BLOCK_SIZE рецептов за шаг.
+    """
+
+    recipe_ids, matrix, features = load_features(Recipe.objects.all())
+    candidates = matrix[:, mark_common_ingredients(matrix, features)].tocsr()
+    transposed = candidates.T.tocsr()
+    for start in range(0, len(recipe_ids), SIMILAR_RECIPES_BLOCK_SIZE):
+        rows = np.arange(
+            start, min(start + SIMILAR_RECIPES_BLOCK_SIZE, len(recipe_ids))
+        )
+        replace_similar(
+            recipe_ids[rows].tolist(),
+            find_similar(
+                recipe_ids, matrix, candidates, transposed, rows
+            )
+        )
+
+
+def score_recipe(recipe_id):
+    """
+    Функция возвращает сходство рецепта с каждым кандидатом в похожие
+    рецепты: загружаются признаки только этих рецептов. Для удаленного
+    рецепта возвращается None.
+    """
+
+    ingredient_ids = Recipe.objects.filter(pk=recipe_id).values_list(
+        'ingredient_ids', flat=True
+    ).first()
+    if ingredient_ids is None:
+        return None
+
+    recipe_ids, matrix, _ = load_features(Recipe.objects.filter(
+        Q(pk=recipe_id) | Q(ingredient_ids__overlap=list(
+            Ingredient.objects.filter(
+                pk__in=ingredient_ids, is_common=False
+            ).values_list('pk', flat=True)
+        ))
+    ))
+    rows = get_rows(recipe_ids, (recipe_id,))
+    if not len(rows):
+        return None
+
+    others = np.flatnonzero(recipe_ids != recipe_id)
+    scores = get_scores(matrix, np.full_like(others, rows[0]), others)
+    return {
+        int(other): float(score)
+        for other, score in zip(recipe_ids[others], scores) if score > 0
+    }
+
+
+def get_top(scores):
+    """
+    Функция возвращает SIMILAR_RECIPES_LIMIT самых похожих рецептов
+    из словаря сходства с рецептами.
+    """
+
+    return sorted(
+        scores.items(), key=lambda item: (-item[1], -item[0])
+    )[:SIMILAR_RECIPES_LIMIT]
+
+
+def schedule_similar_recipes_update(recipe):
+    """
+    Функция ставит обновление похожих рецептов в очередь
+    после фиксации текущей транзакции.
+    """
+
+    transaction.on_commit(lambda: enqueue_job(
+        SIMILAR_RECIPES_JOB, f'recipe:{recipe.pk}', {'recipe': recipe.pk}
+    ))
+
+
+@job_handler(SIMILAR_RECIPES_JOB)
+def update_similar_recipes(job):
+    """
+    Обновляет похожие рецепты после изменения ингредиентов или тегов
+    рецепта. Сходство вычисляется только для строки измененного рецепта.
+    В списки кандидатов рецепт вставляется на свое место, а списки,
+    в которых он опустился или из которых выпал, пересчитываются
+    заново: на его место может встать рецепт, которого в списке нет.
+    Списки остальных рецептов от этого изменения не зависят.
+    """
+
+    recipe_id = job.payload['recipe']
+    scores = score_recipe(recipe_id)
+    if scores is None:
+        return
+
+    current = defaultdict(dict)
+    for owner, similar_id, score in SimilarRecipe.objects.filter(
+        Q(recipe__in=list(scores)) | Q(similar=recipe_id)
+    ).values_list('recipe', 'similar', 'score').iterator(
+        chunk_size=SIMILAR_RECIPES_BATCH_SIZE
+    ):
+        current[owner][similar_id] = score
+
+    changed = {recipe_id: get_top(scores)}
+    for owner in (set(scores) | set(current)) - {recipe_id}:
+        similar = current[owner]
+        score = scores.get(owner, 0)
+        if score < similar.get(recipe_id, 0):
+            changed[owner] = get_top(score_recipe(owner) or {})
+        elif score > similar.get(recipe_id, 0):
+            top = get_top({**similar, recipe_id: score})
+            if recipe_id in dict(top):
+                changed[owner] = top
+
+    replace_similar(list(changed), [
+        SimilarRecipe(recipe_id=owner, similar_id=similar_id, score=score)
+        for owner, top in changed.items()
+        for similar_id, score in top
+    ])
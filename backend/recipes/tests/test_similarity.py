@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from ..jobs import claim_job, run_job
+from ..models import Ingredient, Recipe, RecipeIngredient, SimilarRecipe, Tag
+from ..search import update_recipe_indexes
+from ..similarity import (
+    rebuild_similar_recipes, schedule_similar_recipes_update
+)
+
+User = get_user_model()
+
+
+class SimilarRecipesUpdateTest(TestCase):
+    """
+    После обновления похожих рецептов фоновой задачей списки похожих
+    рецептов совпадают с полным пересчетом.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Имя', last_name='Фамилия', password='password'
+        )
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {index}', measurement_unit='г'
+            )
+            for index in range(8)
+        ]
+        cls.tags = [
+            Tag.objects.create(name=f'Тег {index}', slug=f'tag{index}')
+            for index in range(2)
+        ]
+        cls.recipes = []
+        for index in range(1, 30):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {index}', text='Описание',
+                cooking_time=10
+            )
+            recipe.tags.set((cls.tags[index % 2],))
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=1
+                )
+                for bit, ingredient in enumerate(cls.ingredients)
+                if index * 37 >> bit & 1
+            )
+            cls.recipes.append(recipe)
+        update_recipe_indexes([recipe.pk for recipe in cls.recipes])
+        rebuild_similar_recipes()
+
+    def get_similar(self):
+        return {
+            (recipe_id, similar_id): round(score, 6)
+            for recipe_id, similar_id, score in
+            SimilarRecipe.objects.values_list('recipe', 'similar', 'score')
+        }
+
+    def set_ingredients(self, recipe, ingredients):
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredient.objects.filter(recipe=recipe).delete()
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=1
+                )
+                for ingredient in ingredients
+            )
+            update_recipe_indexes((recipe.pk,))
+            schedule_similar_recipes_update(recipe)
+        while job := claim_job():
+            run_job(job)
+
+    def assert_rebuilt(self):
+        similar = self.get_similar()
+        rebuild_similar_recipes()
+        self.assertEqual(similar, self.get_similar())
+
+    def test_recipe_becomes_more_similar(self):
+        self.set_ingredients(self.recipes[0], self.ingredients[:6])
+        self.assert_rebuilt()
+
+    def test_recipe_becomes_less_similar(self):
+        """
+        Рецепт выпадает из списков похожих рецептов, на его место
+        встают рецепты, которых в списках не было.
+        """
+
+        recipe = max(
+            self.recipes,
+            key=lambda recipe: SimilarRecipe.objects.filter(
+                similar=recipe
+            ).count()
+        )
+        self.set_ingredients(recipe, self.ingredients[-1:])
+        self.assert_rebuilt()
+
+    def test_new_recipe(self):
+        recipe = Recipe.objects.create(
+            author=self.recipes[0].author, name='Новый рецепт',
+            text='Описание', cooking_time=10
+        )
+        recipe.tags.set(self.tags)
+        self.set_ingredients(recipe, self.ingredients[::2])
+        self.assert_rebuilt()
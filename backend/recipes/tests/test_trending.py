@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..jobs import claim_job, run_job
+from ..models import Favorite, Recipe, ShoppingCart
+from ..trending import rebuild_trending_scores
+
+User = get_user_model()
+
+
+@override_settings(TRENDING_HALF_LIFE=60 * 60)
+class TrendingScoreTest(TestCase):
+    """
+    Популярность, измененная при добавлении и удалении событий,
+    совпадает с пересчетом по всем событиям рецепта.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Имя', last_name='Фамилия', password='password'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=author, name='Рецепт', text='Описание', cooking_time=10
+        )
+        cls.users = [
+            User.objects.create_user(
+                email=f'user{index}@example.com', username=f'user{index}',
+                first_name='Имя', last_name='Фамилия', password='password'
+            )
+            for index in range(6)
+        ]
+
+    def setUp(self):
+        # События разнесены по времени: вклады отличаются на порядки,
+        # последнее событие составляет почти всю популярность.
+        now = timezone.now()
+        for index, user in enumerate(self.users):
+            created = now - timedelta(hours=10 * (len(self.users) - index))
+            for model in (Favorite, ShoppingCart):
+                event = model.objects.create(user=user, recipe=self.recipe)
+                model.objects.filter(pk=event.pk).update(created=created)
+        rebuild_trending_scores((self.recipe.pk,))
+
+    def get_score(self):
+        return Recipe.objects.get(pk=self.recipe.pk).trending_score
+
+    def assert_rebuilt(self):
+        score = self.get_score()
+        rebuild_trending_scores((self.recipe.pk,))
+        self.assertAlmostEqual(score, self.get_score(), places=6)
+
+    def remove(self, event):
+        with self.captureOnCommitCallbacks(execute=True):
+            event.delete()
+        while job := claim_job():
+            run_job(job)
+        self.assert_rebuilt()
+
+    def test_add_event(self):
+        Favorite.objects.create(
+            user=self.recipe.author, recipe=self.recipe
+        )
+        self.assert_rebuilt()
+
+    def test_remove_oldest_first(self):
+        for model in (Favorite, ShoppingCart):
+            for event in model.objects.order_by('created'):
+                self.remove(event)
+        self.assertEqual(self.get_score(), 0)
+
+    def test_remove_newest_first(self):
+        for model in (Favorite, ShoppingCart):
+            for event in model.objects.order_by('-created'):
+                self.remove(event)
+        self.assertEqual(self.get_score(), 0)
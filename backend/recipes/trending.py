@@ -0,0 +1,115 @@
+"""
+Популярность рецепта за последнее время — сумма вкладов добавлений
+в избранное и список покупок, каждый из которых уменьшается вдвое
+за TRENDING_HALF_LIFE. Вместо суммы, которую пришлось бы уменьшать
+для всех рецептов со временем, хранится ее логарифм, отсчитанный
+от TRENDING_EPOCH: вклад события тем больше, чем позже оно произошло,
+а порядок рецептов совпадает с порядком по текущей сумме вкладов.
+Поэтому при каждом событии изменяется только один рецепт, а вклад
+удаленного события вычитается без загрузки остальных событий.
+"""
+
+import math
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Abs, Exp, Greatest, Least, Ln
+
+from .constants import (
+    TRENDING_BATCH_SIZE, TRENDING_EPOCH, TRENDING_EXP_LIMIT, TRENDING_JOB,
+    TRENDING_MIN_REMOVAL_GAP
+)
+from .jobs import enqueue_job, job_handler
+from .models import Favorite, Recipe, ShoppingCart
+
+
+def get_event_score(moment):
+    """Логарифм вклада события, произошедшего в момент moment."""
+
+    return (
+        (moment - TRENDING_EPOCH).total_seconds()
+        * math.log(2) / settings.TRENDING_HALF_LIFE
+    )
+
+
+def logaddexp(a, b):
+    """Логарифм суммы exp(a) + exp(b) без переполнения."""
+
+    return max(a, b) + math.log1p(math.exp(-abs(a - b)))
+
+
+def add_trending_event(recipe_id, moment):
+    """Функция добавляет к популярности рецепта вклад нового события."""
+
+    score = Value(get_event_score(moment))
+    Recipe.objects.filter(pk=recipe_id).update(
+        trending_score=Greatest(F('trending_score'), score) + Ln(
+            1 + Exp(-Least(
+                Abs(F('trending_score') - score), TRENDING_EXP_LIMIT
+            ))
+        )
+    )
+
+
+def remove_trending_event(recipe_id, moment):
+    """
+    Функция вычитает из популярности рецепта вклад удаленного события:
+    log(exp(a) - exp(e)) = a + log(1 - exp(e - a)). Если вклад события
+    почти равен всей популярности, разность вычисляется неточно,
+    и популярность рецепта пересчитывается фоновой задачей.
+    """
+
+    score = get_event_score(moment)
+    updated = Recipe.objects.filter(
+        pk=recipe_id, trending_score__gt=score + TRENDING_MIN_REMOVAL_GAP
+    ).update(
+        trending_score=F('trending_score') + Ln(
+            1 - Exp(Value(score) - F('trending_score'))
+        )
+    )
+    if not updated:
+        transaction.on_commit(lambda: enqueue_job(
+            TRENDING_JOB, f'recipe:{recipe_id}', {'recipe': recipe_id}
+        ))
+
+
+@job_handler(TRENDING_JOB)
+def rebuild_recipe_trending_score(job):
+    rebuild_trending_scores((job.payload['recipe'],))
+
+
+def rebuild_trending_scores(recipe_ids=None):
+    """
+    Функция пересчитывает популярность рецептов recipe_ids
+    (или всех рецептов) по датам добавления в избранное и список покупок.
+    """
+
+    scores = defaultdict(float)
+    for model in (Favorite, ShoppingCart):
+        events = model.objects.all()
+        if recipe_ids is not None:
+            events = events.filter(recipe__in=recipe_ids)
+        for recipe_id, created in events.values_list(
+            'recipe', 'created'
+        ).iterator(chunk_size=TRENDING_BATCH_SIZE):
+            scores[recipe_id] = logaddexp(
+                scores[recipe_id], get_event_score(created)
+            )
+
+    recipes = Recipe.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+    recipes = recipes.values_list('pk', flat=True).iterator(
+        chunk_size=TRENDING_BATCH_SIZE
+    )
+    while batch := list(islice(recipes, TRENDING_BATCH_SIZE)):
+        Recipe.objects.bulk_update(
+            [
+                Recipe(pk=pk, trending_score=scores[pk])
+                for pk in batch
+            ],
+            ('trending_score',)
+        )
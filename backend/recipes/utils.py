@@ -0,0 +1,18 @@
+from .constants import BASE62_ALPHABET, SHORT_LINK_CACHE_PREFIX
+
+
+def encode_base62(number):
+    """Функция переводит неотрицательное целое число в строку base62."""
+
+    if number == 0:
+        return BASE62_ALPHABET[0]
+
+    digits = []
+    while number:
+        number, remainder = divmod(number, len(BASE62_ALPHABET))
+        digits.append(BASE62_ALPHABET[remainder])
+    return ''.join(reversed(digits))
+
+
+def get_short_link_cache_key(token):
+    return f'{SHORT_LINK_CACHE_PREFIX}:{token}'
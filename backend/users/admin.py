@@ -5,6 +5,8 @@ from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import gettext_lazy
 from rest_framework.authtoken.models import TokenProxy
 
+from recipes.images import schedule_image_variants
+from .constants import AVATAR_VARIANTS
 from .models import Subscription, UserProfile
 
 
@@ -23,12 +25,20 @@ class UserProfileAdmin(UserAdmin):
         (gettext_lazy('Important dates'), {
             'fields': ('last_login', 'date_joined')
         }),
-        ('Дополнительные поля', {'fields': ('avatar',)}),
+        ('Дополнительные поля', {
+            'fields': ('avatar', 'recipes_count', 'followers_count')
+        }),
     )
+    readonly_fields = ('recipes_count', 'followers_count')
     search_fields = ('username', 'email')
     list_filter = ('is_staff', 'is_active')
     filter_horizontal = ('user_permissions',)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'avatar' in form.changed_data:
+            schedule_image_variants(obj, 'avatar', AVATAR_VARIANTS)
+
     def formfield_for_manytomany(self, db_field, request, **kwargs):
         if db_field.name == 'user_permissions':
             content_types_to_exclude = ContentType.objects.filter(
@@ -2,3 +2,21 @@
 EMAIL_MAX_LENGTH = 254
 OBJECT_TITLE_LIMIT = 64
 USERNAME_MAX_LENGTH = 150
+
+# Уменьшенные копии аватара: поле модели и максимальный размер
+AVATAR_VARIANTS = {
+    'avatar_thumbnail': (96, 96),
+}
+
+# Декодирование изображений в base64: размер части строки (кратен 4)
+# и сигнатуры поддерживаемых форматов (смещение, байты, расширение)
+BASE64_CHUNK_SIZE = 64 * 1024
+BASE64_PREFIX = ';base64,'
+IMAGE_SIGNATURE_LENGTH = 12
+IMAGE_SIGNATURES = (
+    (0, b'\x89PNG\r\n\x1a\n', 'png'),
+    (0, b'\xff\xd8\xff', 'jpg'),
+    (0, b'GIF87a', 'gif'),
+    (0, b'GIF89a', 'gif'),
+    (8, b'WEBP', 'webp'),
+)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_userprofile_followers_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='users/variants/', verbose_name='Миниатюра аватара'),
+        ),
+    ]
@@ -45,6 +45,16 @@ class UserProfile(AbstractUser):
         upload_to='users/',
         blank=True, null=True, verbose_name='Аватар'
     )
+    avatar_thumbnail = models.ImageField(
+        upload_to='users/variants/', blank=True, null=True,
+        editable=False, verbose_name='Миниатюра аватара'
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Количество рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Количество подписчиков'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name')
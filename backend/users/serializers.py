@@ -1,38 +1,153 @@
 import base64
+import binascii
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
 from rest_framework import serializers
 
+from .constants import (
+    BASE64_CHUNK_SIZE, BASE64_PREFIX, IMAGE_SIGNATURE_LENGTH, IMAGE_SIGNATURES
+)
 from .models import Subscription
 
 User = get_user_model()
 
 
+def get_recipes_limit(request):
+    """
+    Функция возвращает значение параметра recipes_limit
+    или None, если параметр не передан или некорректен.
+    """
+
+    try:
+        recipes_limit = int(request.query_params['recipes_limit'])
+    except (KeyError, ValueError):
+        return None
+    return recipes_limit if recipes_limit >= 0 else None
+
+
+class Base64UploadedFile(TemporaryUploadedFile):
+    """
+    Временный файл с декодированным изображением. Хранилище перемещает
+    его при сохранении, поэтому файл закрывается явно: метод close
+    игнорирует отсутствие уже перемещенного файла.
+    """
+
+    def __del__(self):
+        self.close()
+
+
+def get_image_extension(header):
+    """
+    Функция возвращает расширение изображения по первым байтам файла
+    или None, если формат не поддерживается.
+    """
+
+    for offset, signature, extension in IMAGE_SIGNATURES:
+        if header[offset:offset + len(signature)] == signature:
+            return extension
+    return None
+
+
 class Base64ImageField(serializers.ImageField):
+    """
+    Поле для загрузки изображения в виде строки data:image/...;base64,...
+    Строка декодируется частями сразу во временный файл, поэтому
+    декодированное изображение целиком в памяти не хранится.
+    Слишком большие строки и данные, не являющиеся изображением,
+    отклоняются до декодирования всей строки. Размер файла, загруженного
+    через multipart/form-data, ограничен так же.
+    """
+
+    default_error_messages = {
+        **serializers.ImageField.default_error_messages,
+        'too_large': 'Размер изображения превышает {max_size} байт.',
+        'invalid_base64': 'Некорректные данные изображения в base64.',
+    }
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-
-            data = ContentFile(base64.b64decode(imgstr), name='image.' + ext)
+            data = self.decode(data)
+        elif getattr(data, 'size', 0) > settings.IMAGE_MAX_SIZE:
+            self.fail('too_large', max_size=settings.IMAGE_MAX_SIZE)
 
         return super().to_internal_value(data)
 
+    def decode(self, data):
+        start = data.find(BASE64_PREFIX)
+        if start == -1 or start + len(BASE64_PREFIX) == len(data):
+            self.fail('invalid_base64')
+        start += len(BASE64_PREFIX)
+
+        # Оценка размера по длине строки без декодирования.
+        if (len(data) - start) // 4 * 3 > settings.IMAGE_MAX_SIZE:
+            self.fail('too_large', max_size=settings.IMAGE_MAX_SIZE)
+
+        file = Base64UploadedFile(
+            'image', 'application/octet-stream', 0, None
+        )
+        try:
+            for position in range(start, len(data), BASE64_CHUNK_SIZE):
+                chunk = base64.b64decode(
+                    data[position:position + BASE64_CHUNK_SIZE],
+                    validate=True
+                )
+                if position == start:
+                    extension = get_image_extension(
+                        chunk[:IMAGE_SIGNATURE_LENGTH]
+                    )
+                    if extension is None:
+                        self.fail('invalid_image')
+                file.write(chunk)
+        except binascii.Error:
+            file.close()
+            self.fail('invalid_base64')
+        except serializers.ValidationError:
+            file.close()
+            raise
+
+        file.size = file.tell()
+        file.name = f'image.{extension}'
+        file.seek(0)
+        return file
+
+
+class ImageVariantField(serializers.ImageField):
+    """
+    Поле для чтения URL уменьшенной копии изображения.
+    Пока копия не создана, возвращает URL оригинала.
+    """
+
+    def __init__(self, original, **kwargs):
+        self.original = original
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return (
+            super().get_attribute(instance)
+            or getattr(instance, self.original)
+        )
+
 
 class UserReadSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar_thumbnail = ImageVariantField(original='avatar')
 
     class Meta:
         model = User
         fields = (
             'id', 'username', 'email', 'first_name', 'last_name',
-            'is_subscribed', 'avatar'
+            'is_subscribed', 'avatar', 'avatar_thumbnail'
         )
         read_only_fields = fields
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Subscription.objects.filter(
@@ -88,7 +203,7 @@ class AvatarSerializer(serializers.ModelSerializer):
 
 class SubscriptionSerializer(UserReadSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta(UserReadSerializer.Meta):
         fields = UserReadSerializer.Meta.fields + ('recipes', 'recipes_count')
@@ -97,18 +212,13 @@ class SubscriptionSerializer(UserReadSerializer):
         from api.serializers import RecipeMinifiedSerializer
 
         request = self.context['request']
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = obj.recipes.all()
 
-        if recipes_limit:
-            try:
-                recipes = recipes[:int(recipes_limit)]
-            except ValueError:
-                pass
+        # Рецепты, загруженные во view одним запросом для всей страницы.
+        if hasattr(obj, 'subscription_recipes'):
+            recipes = obj.subscription_recipes
+        else:
+            recipes = obj.recipes.all()[:get_recipes_limit(request)]
 
         return RecipeMinifiedSerializer(
             recipes, many=True, context={'request': request}
         ).data
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.feed import backfill_feed, clear_feed, schedule_author_backfill
+from .models import Subscription
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, **kwargs):
+    if created:
+        User.objects.filter(pk=instance.author_id).update(
+            followers_count=F('followers_count') + 1
+        )
+        backfill_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    User.objects.filter(pk=instance.author_id).update(
+        followers_count=F('followers_count') - 1
+    )
+    clear_feed(instance.user_id, instance.author_id)
+    # Рецепты, опубликованные автором, пока у него было больше
+    # FEED_FANOUT_MAX_FOLLOWERS подписчиков, не рассылались по лентам.
+    if User.objects.filter(
+        pk=instance.author_id,
+        followers_count=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).exists():
+        transaction.on_commit(
+            lambda: schedule_author_backfill(instance.author_id)
+        )
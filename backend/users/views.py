@@ -1,16 +1,24 @@
 from django.contrib.auth import get_user_model
+from django.db.models import BooleanField, Prefetch, Value
 from django.shortcuts import get_object_or_404
 from rest_framework import status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action, api_view, parser_classes, permission_classes
+)
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
+from api.pagination import SubscriptionPagination
+from recipes.images import schedule_image_variants
+from recipes.models import Recipe
+from .constants import AVATAR_VARIANTS
 from .models import Subscription
 from .serializers import (
     AvatarSerializer, SetPasswordSerializer, SubscriptionSerializer,
-    UserReadSerializer, UserWriteSerializer
+    UserReadSerializer, UserWriteSerializer, get_recipes_limit
 )
 
 User = get_user_model()
@@ -51,13 +59,20 @@ class UserViewSet(ModelViewSet):
 
 @api_view(['PUT', 'DELETE'])
 @permission_classes((IsAuthenticated,))
+@parser_classes((JSONParser, MultiPartParser))
 def set_avatar(request):
+    """
+    Аватар передается строкой base64 в JSON или файлом в поле avatar
+    формы multipart/form-data.
+    """
+
     user = request.user
 
     if request.method == 'PUT':
         serializer = AvatarSerializer(user, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        schedule_image_variants(user, 'avatar', AVATAR_VARIANTS)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     elif request.method == 'DELETE':
@@ -65,17 +80,36 @@ def set_avatar(request):
             user.avatar.delete(save=False)
         user.avatar = None
         user.save(update_fields=('avatar',))
+        schedule_image_variants(user, 'avatar', AVATAR_VARIANTS)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class SubscriptionViewSet(GenericViewSet):
     permission_classes = (IsAuthenticated,)
+    pagination_class = SubscriptionPagination
 
     def list(self, request):
+        """
+        Список подписок. Последние recipes_limit рецептов всех авторов
+        страницы загружаются одним запросом: Django выполняет срез
+        в prefetch через ROW_NUMBER() OVER (PARTITION BY author_id).
+        """
+
         user = request.user
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'image_thumbnail', 'cooking_time',
+            'author', 'created'
+        )[:get_recipes_limit(request)]
+
         subscriptions = User.objects.filter(
             followers__user=user
-        ).prefetch_related('recipes')
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).prefetch_related(
+            Prefetch(
+                'recipes', queryset=recipes, to_attr='subscription_recipes'
+            )
+        )
 
         page = self.paginate_queryset(subscriptions)
         if page is not None:
@@ -10,6 +10,7 @@ const Card = ({
   name = "Без названия",
   id,
   image,
+  image_card,
   is_favorited,
   is_in_shopping_cart,
   tags,
@@ -46,7 +47,7 @@ const Card = ({
         title={
           <div
             className={styles.card__image}
-            style={{ backgroundImage: `url(${image})` }}
+            style={{ backgroundImage: `url(${image_card || image})` }}
           />
         }
       />